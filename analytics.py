@@ -0,0 +1,299 @@
+# analytics.py
+
+# ფინანსური და სტატისტიკური რეპორტები რეესტრის ერთჯერადი გადათამაშებით (replay).
+# NumPy თუ დაყენებულია, აგრეგაცია ვექტორიზებულია; წინააღმდეგ შემთხვევაში - სუფთა Python.
+
+from collections import defaultdict
+from datetime import date, datetime
+
+from courses_data import discount_table, discount_percent
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _replay_checkouts(records):
+    """გადათამაშებს რეესტრს და აბრუნებს გადახდებს (checkout) ჩანაწერების თანმიმდევრობით.
+
+    გადახდა = ერთი სტუდენტის ერთი ქვითრის Active ჩანაწერები. სხვა სტუდენტების ხაზები
+    (მაგ. სხვა მაგიდიდან შუაში ჩაწერილი) გადახდას არ ხურავს; მას ხურავს მხოლოდ იმავე
+    სტუდენტის გაუქმება ან სხვა ქვითარი.
+    subjects_total = სტუდენტის აქტიური კურსები გადახდამდე + ამ გადახდის კურსები,
+    ზუსტად ისე, როგორც register_process და edit_registration ითვლიან ფასდაკლებას
+    (edit_registration-ში გაუქმებები ახალ ჩანაწერებამდე იწერება).
+    """
+    active = defaultdict(set)  # student_key -> {course_id}
+    checkouts = []
+    open_checkouts = {}  # student_key -> სტუდენტის ღია გადახდა
+
+    for row in records:
+        student_key = (row["name"], row["surname"], row["father_name"])
+        if row["status"] == "Active":
+            current = open_checkouts.get(student_key)
+            if current is None or current["receipt_id"] != row["receipt_id"]:
+                current = {
+                    "receipt_id": row["receipt_id"],
+                    "student": student_key,
+                    "existing_subjects": len(active[student_key]),
+                    "courses": [],
+                }
+                checkouts.append(current)
+                open_checkouts[student_key] = current
+            current["courses"].append((row["course_id"], row["course_name"]))
+            active[student_key].add(row["course_id"])
+        else:
+            open_checkouts.pop(student_key, None)
+            if row["status"] == "Cancelled":
+                active[student_key].discard(row["course_id"])
+
+    for checkout in checkouts:
+        checkout["subjects_total"] = checkout["existing_subjects"] + len(checkout["courses"])
+    return checkouts
+
+
+def _course_sort_key(course_id):
+    # რიცხვითი id-ები რიცხვულად, დანარჩენი მათ შემდეგ ტექსტურად; გასაღები ყოველთვის ერთი ტიპისაა
+    digits = course_id.isdigit()
+    return (not digits, int(course_id) if digits else 0, course_id)
+
+
+def _billed_per_checkout(subject_counts, course_counts, base_price, table):
+    """აბრუნებს (discount_percents, prices_per_subject, billed) სიებს თითო გადახდაზე."""
+    if np is not None and subject_counts:
+        top = max(table)
+        lookup = np.array([discount_percent(n, table) for n in range(top + 1)], dtype=float)
+        counts = np.minimum(np.asarray(subject_counts), top)
+        percents = lookup[counts]
+        prices = base_price - base_price * (percents / 100)
+        billed = prices * np.asarray(course_counts)
+        return percents.astype(int).tolist(), prices.tolist(), billed.tolist()
+
+    percents = [discount_percent(n, table) for n in subject_counts]
+    prices = [base_price - base_price * (p / 100) for p in percents]
+    billed = [price * n for price, n in zip(prices, course_counts)]
+    return percents, prices, billed
+
+
+def revenue_report(records, base_price, table=discount_table):
+    """შემოსავლის რეპორტი: თითო ქვითარზე, თითო კურსზე და თითო ფასდაკლების საფეხურზე.
+
+    გაუქმება თანხას არ აბრუნებს - სისტემაში თანხის დაბრუნების წესი არ არსებობს.
+    """
+    checkouts = _replay_checkouts(records)
+    percents, prices, billed = _billed_per_checkout(
+        [c["subjects_total"] for c in checkouts],
+        [len(c["courses"]) for c in checkouts],
+        base_price, table,
+    )
+
+    receipts = []
+    courses = {}
+    tiers = {}
+    for checkout, percent, price, amount in zip(checkouts, percents, prices, billed):
+        name, surname, father_name = checkout["student"]
+        receipts.append({
+            "receipt_id": checkout["receipt_id"],
+            "name": name, "surname": surname, "father_name": father_name,
+            "course_ids": [course_id for course_id, _ in checkout["courses"]],
+            "subjects_total": checkout["subjects_total"],
+            "discount_percent": percent,
+            "price_per_subject": price,
+            "billed": amount,
+        })
+
+        for course_id, course_name in checkout["courses"]:
+            course = courses.setdefault(course_id, {"name": course_name, "registrations": 0, "billed": 0.0})
+            course["registrations"] += 1
+            course["billed"] += price
+
+        tier = tiers.setdefault(percent, {"receipts": 0, "subjects": 0, "billed": 0.0})
+        tier["receipts"] += 1
+        tier["subjects"] += len(checkout["courses"])
+        tier["billed"] += amount
+
+    return {
+        "receipts": receipts,
+        "courses": dict(sorted(courses.items(), key=lambda item: _course_sort_key(item[0]))),
+        "tiers": dict(sorted(tiers.items())),
+        "total": sum(billed),
+    }
+
+
+# =========================================================
+# ჯგუფების შევსების ანალიტიკა (დღის/კვირის ბაკეტებით)
+# =========================================================
+
+def _ts_to_datetime(ts):
+    s = str(ts)
+    return datetime(int(s[0:4]), int(s[4:6]), int(s[6:8]), int(s[8:10]), int(s[10:12]), int(s[12:14]))
+
+
+def _day_label(day):
+    if not day:
+        return "უცნობი"
+    s = str(day)
+    return f"{s[0:4]}-{s[4:6]}-{s[6:8]}"
+
+
+def _week_label(day):
+    if not day:
+        return "უცნობი"
+    s = str(day)
+    year, week, _ = date(int(s[0:4]), int(s[4:6]), int(s[6:8])).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class CapacityStats:
+    """ჯგუფების შევსების სტატისტიკა, რომელიც ახალი ჩანაწერებით ინკრემენტულად ახლდება.
+
+    მოვლენები ინახება დღის ბაკეტებში (YYYYMMDD); კვირის ბაკეტები და საგნის ჯამები
+    report()-ში ითვლება დღეების შეჯამებით, ამიტომ add_records() ხაზზე O(1)-ია.
+    to_state()/from_state() მდგომარეობას JSON-ად ინახავს და აღადგენს, რომ შემდეგმა პროცესმა
+    მხოლოდ ახალი ხაზები და უარები წაიკითხოს (იხ. StudentDatabase.get_capacity_stats).
+    """
+
+    def __init__(self, courses):
+        self.courses = courses
+        self._capacity = {course["id"]: course["capacity"] for course in courses}
+        self._active = set()  # (student_key, course_id), რომლის ბოლო სტატუსია Active
+        self._occupied = dict.fromkeys(self._capacity, 0)
+        self._first_ts = {}  # course_id -> ყველაზე ადრეული რეგისტრაცია (დროით და არა ფაილის რიგით)
+        self._full_ts = {}  # course_id -> პირველად შევსების მომენტი
+        # course_id -> { day: [registrations, cancellations, turned_away] }
+        self._days = {course_id: defaultdict(lambda: [0, 0, 0]) for course_id in self._capacity}
+        # რამდენი ბაიტია უკვე წაკითხული უარების ჟურნალიდან
+        self.rejections_offset = 0
+
+    @classmethod
+    def from_records(cls, courses, records):
+        stats = cls(courses)
+        stats.add_records(records)
+        return stats
+
+    def to_state(self):
+        """JSON-ად შესანახი მდგომარეობა; from_state() მისგან აღადგენს სტატისტიკას სხვა პროცესში."""
+        return {
+            "capacity": self._capacity,
+            "active": [list(student_key) + [course_id] for student_key, course_id in self._active],
+            "first_ts": self._first_ts,
+            "full_ts": self._full_ts,
+            "days": {course_id: {str(day): counts for day, counts in days.items()}
+                     for course_id, days in self._days.items() if days},
+            "rejections_offset": self.rejections_offset,
+        }
+
+    @classmethod
+    def from_state(cls, courses, state):
+        """to_state()-ის შებრუნებული; ValueError, თუ მდგომარეობა სხვა ჯგუფების სიით (ან ტევადობებით) შეიქმნა."""
+        stats = cls(courses)
+        if state["capacity"] != stats._capacity:
+            raise ValueError("ჯგუფების სია ან ტევადობები შეიცვალა")
+        for *student_key, course_id in state["active"]:
+            stats._active.add((tuple(student_key), course_id))
+            stats._occupied[course_id] += 1
+        stats._first_ts.update(state["first_ts"])
+        stats._full_ts.update(state["full_ts"])
+        for course_id, days in state["days"].items():
+            for day, counts in days.items():
+                stats._days[course_id][int(day)] = list(counts)
+        stats.rejections_offset = state["rejections_offset"]
+        return stats
+
+    def add_records(self, records):
+        capacity = self._capacity
+        active = self._active
+        occupied = self._occupied
+        for row in records:
+            course_id = row.course_id
+            if course_id not in capacity:
+                continue
+            key = (row.student_key, course_id)
+            was_active = key in active
+            if row.status == "Active":
+                active.add(key)
+            else:
+                active.discard(key)
+            if row.status == "Active" and not was_active:
+                occupied[course_id] += 1
+                self._days[course_id][row.ts // 1000000][0] += 1
+                # მაგიდების საათები შეიძლება აცდენილი იყოს - ფაილის რიგი დროის რიგი არ არის
+                first = self._first_ts.get(course_id)
+                if first is None or row.ts < first:
+                    self._first_ts[course_id] = row.ts
+                if occupied[course_id] >= capacity[course_id]:
+                    self._full_ts.setdefault(course_id, row.ts)
+            elif was_active and row.status != "Active":
+                occupied[course_id] -= 1
+                if row.status == "Cancelled":
+                    self._days[course_id][row.ts // 1000000][1] += 1
+
+    def footprint(self):
+        """შენახული ობიექტების რაოდენობა მეხსიერების შესაფასებლად (იხ. branches.ENTRY_BYTES)."""
+        return {"enrollment": len(self._active), "day_bucket": sum(map(len, self._days.values()))}
+
+    def add_rejections(self, rejections):
+        """rejections - (course_id, ts) წყვილები register_process-ის "ჯგუფი შევსებულია" უარებიდან."""
+        for course_id, ts in rejections:
+            if course_id in self._days:
+                self._days[course_id][ts // 1000000][2] += 1
+
+    @staticmethod
+    def _summary(capacity, occupied, days, label):
+        registrations = sum(counts[0] for counts in days.values())
+        cancellations = sum(counts[1] for counts in days.values())
+        buckets = defaultdict(lambda: {"registrations": 0, "cancellations": 0, "turned_away": 0})
+        for day in sorted(days):
+            bucket = buckets[label(day)]
+            bucket["registrations"] += days[day][0]
+            bucket["cancellations"] += days[day][1]
+            bucket["turned_away"] += days[day][2]
+        return {
+            "capacity": capacity,
+            "occupied": occupied,
+            "fill_rate": occupied / capacity if capacity else 0.0,
+            "registrations": registrations,
+            "cancellations": cancellations,
+            "churn": cancellations / registrations if registrations else 0.0,
+            "turned_away": sum(counts[2] for counts in days.values()),
+            "buckets": dict(buckets),
+        }
+
+    def report(self, bucket="day", course_ids=None):
+        """{"bucket", "sections": [...], "subjects": {...}}; bucket - "day" ან "week".
+
+        course_ids - თუ მითითებულია, რეპორტში (საგნების ჯამების ჩათვლით) მხოლოდ ეს ჯგუფები შედის.
+        """
+        label = _week_label if bucket == "week" else _day_label
+        sections = []
+        subject_days = defaultdict(lambda: defaultdict(lambda: [0, 0, 0]))
+        subject_totals = defaultdict(lambda: [0, 0])  # capacity, occupied
+
+        for course in self.courses:
+            course_id = course["id"]
+            if course_ids is not None and course_id not in course_ids:
+                continue
+            subject = course["name"].split("(")[0].strip()
+            days = self._days[course_id]
+            section = self._summary(course["capacity"], self._occupied[course_id], days, label)
+
+            time_to_full = None
+            if self._full_ts.get(course_id) and self._first_ts.get(course_id):
+                delta = _ts_to_datetime(self._full_ts[course_id]) - _ts_to_datetime(self._first_ts[course_id])
+                time_to_full = max(delta.total_seconds(), 0) / 3600
+            section.update(id=course_id, name=course["name"], subject=subject, time_to_full_hours=time_to_full)
+            sections.append(section)
+
+            for day, counts in days.items():
+                merged = subject_days[subject][day]
+                for i in range(3):
+                    merged[i] += counts[i]
+            subject_totals[subject][0] += course["capacity"]
+            subject_totals[subject][1] += self._occupied[course_id]
+
+        subjects = {
+            subject: self._summary(capacity, occupied, subject_days[subject], label)
+            for subject, (capacity, occupied) in subject_totals.items()
+        }
+        return {"bucket": bucket, "sections": sections, "subjects": subjects}
@@ -0,0 +1,100 @@
+# branches.py
+
+# რამდენიმე ფილიალის/სემესტრის მომსახურება ერთ პროცესში.
+# თითო ფილიალს აქვს საკუთარი რეესტრი და კურსების კატალოგი. ფილიალის მდგომარეობა
+# იტვირთება პირველ გამოყენებაზე; მეხსიერების ლიმიტის გადაჭარბებისას იშლება
+# ყველაზე დიდი ხნის წინ გამოყენებული (LRU) ფილიალი.
+# ლიმიტი შეფასებაა და არა გაზომვა: თითო წარმოდგენა ასახელებს, რამდენ ობიექტს ინახავს
+# (footprint() - ჩანაწერები, ლექსიკონის ელემენტები, ინდექსის სიტყვები...), ფილიალის
+# მეხსიერება კი ამ რაოდენობების ENTRY_BYTES-ზე ნამრავლების ჯამია.
+
+import json
+import os
+from collections import OrderedDict
+
+from courses_data import university_prep_data
+
+BRANCHES_FILE = "branches.json"
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+# ერთი ობიექტის ბაიტები, tracemalloc-ით გაზომილი 60 000 - 300 000 ხაზის რეესტრებზე
+# სხვადასხვა პროპორციით (სტუდენტები / ხაზები 1% - 100%, გაუქმებები 0 - 70%); შეფასება
+# გაზომვიდან ±10%-ით განსხვავდებოდა. წარმოდგენები ფაილს ცალ-ცალკე კითხულობენ, ამიტომ
+# Record-ები ერთმანეთს არ უზიარებენ; გამონაკლისია ცოცხალი მდგომარეობიდან აგებული სახელების
+# ინდექსი, რომლის სტრიქონებიც ორჯერ ითვლება. mmap-ით შესრულებული მოთხოვნები წარმოდგენას
+# არ ტვირთავს და შეფასებაში არ ჩანს.
+ENTRY_BYTES = {
+    "record": 280,  # Record და მისი არაგაზიარებული სტრიქონები (ტელეფონი, ელ-ფოსტა, ქვითარი)
+    "state_entry": 170,  # (სტუდენტი, კურსი) -> ბოლო სტატუსი
+    "student": 430,  # სტუდენტის კონტაქტები, აქტიური კურსების ლექსიკონი და სახელის სტრიქონები
+    "receipt": 100,
+    "timeline_event": 40,  # დროის ნიშნული დალაგებულ სიაში
+    "timeline_entry": 90,  # checkpoint-ის ასლის ან ცვლილების ელემენტი
+    "index_key": 140,
+    "index_word": 540,  # ნორმალიზებული სიტყვა და მისი გასაღებების სიმრავლე
+    "enrollment": 210,
+    "day_bucket": 200,
+}
+
+def load_branches(path=BRANCHES_FILE):
+    """კითხულობს ფილიალების კონფიგურაციას.
+
+    ფორმატი: { "ფილიალი": {"db": "registry.csv", "catalog": "catalog.json"} }.
+    catalog არასავალდებულოა - მის გარეშე გამოიყენება university_prep_data.
+    აბრუნებს { name: {"db": ..., "catalog": dict} }.
+    """
+    with open(path, mode='r', encoding='utf-8') as f:
+        config = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+
+    branches = {}
+    for name, entry in config.items():
+        catalog = university_prep_data
+        if entry.get("catalog"):
+            with open(os.path.join(base_dir, entry["catalog"]), mode='r', encoding='utf-8') as f:
+                catalog = json.load(f)
+        branches[name] = {"db": os.path.join(base_dir, entry["db"]), "catalog": catalog}
+    return branches
+
+
+class BranchHost:
+    """ფილიალების LRU ქეში. factory(db_file, catalog) ქმნის ფილიალის სისტემას (RegistrationSystem)."""
+
+    def __init__(self, branches, factory, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.branches = branches
+        self.factory = factory
+        self.memory_budget = memory_budget
+        self._loaded = OrderedDict()  # name -> system
+
+    def __contains__(self, name):
+        return name in self.branches
+
+    def loaded(self):
+        """ჩატვირთული ფილიალები, ბოლოს გამოყენებული ბოლოშია."""
+        return list(self._loaded)
+
+    @staticmethod
+    def _estimate(system):
+        """ფილიალის ჩატვირთული წარმოდგენების სავარაუდო მეხსიერება ბაიტებში."""
+        return sum(ENTRY_BYTES[kind] * count
+                   for footprint in system.db.loaded_views().values() for kind, count in footprint.items())
+
+    def get(self, name):
+        """აბრუნებს ფილიალის სისტემას; საჭიროების შემთხვევაში ტვირთავს და ათავისუფლებს ძველებს."""
+        if name not in self.branches:
+            raise KeyError(name)
+        if name in self._loaded:
+            system = self._loaded.pop(name)
+        else:
+            branch = self.branches[name]
+            system = self.factory(branch["db"], branch["catalog"])
+            # წარმოდგენები ფილიალის გამოყენებისას იტვირთება და იზრდება - ლიმიტი მაშინვე მოწმდება
+            system.db.on_views_changed = self._evict
+        self._loaded[name] = system
+        self._evict()
+        return system
+
+    def _evict(self):
+        # ბოლოს გამოყენებული ფილიალი (სიის ბოლოში) არასოდეს იშლება
+        while len(self._loaded) > 1 and sum(map(self._estimate, self._loaded.values())) > self.memory_budget:
+            _, system = self._loaded.popitem(last=False)
+            system.db.on_views_changed = None
@@ -0,0 +1,191 @@
+# change_feed.py
+
+# რეესტრის ცვლილებების ნაკადი გარე სისტემებისთვის (SMS, ბუღალტერია).
+# კურსორი = (ბაიტური offset, წაკითხული ხაზების რაოდენობა). მომხმარებელი კითხულობს
+# მხოლოდ კურსორის შემდეგ დამატებულ ხაზებს და ინახავს ახალ კურსორს, ამიტომ
+# სინქრონიზაციის ღირებულება ცვლილებების მოცულობის პროპორციულია და არა ფაილის ზომის.
+# შენახულ კურსორს ახლავს ფაილის inode და offset-მდე ბოლო ბაიტების ჰეში: თავიდან დაწერილი
+# ფაილი (მაგ. fsck --repair-ის ასლი) ძველ offset-ს ხაზის საზღვარზეც რომ ემთხვეოდეს, შეცდომაა.
+# inotify_simple თუ დაყენებულია, follow() ელოდება ფაილის ცვლილებას; სხვა შემთხვევაში - polling.
+
+import csv
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from records import RecordReader
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: ბლოკირების გარეშე
+    fcntl = None
+
+# ფაილის ნაწილი offset-მდე, რომლის ჰეშიც კურსორთან ერთად ინახება; ხაზის ბოლო ველები
+# (ქვითარი, დრო) მასში ხვდება, ამიტომ გადაწერილ ფაილში ის თითქმის ყოველთვის განსხვავდება
+FINGERPRINT_BYTES = 64
+
+
+def file_identity(filename, offset):
+    """ფაილის inode და offset-მდე FINGERPRINT_BYTES ბაიტის ჰეში - offset-თან ერთად ინახება, რომ
+    შემდეგ პროცესმა შეამოწმოს, ისევ იგივე ფაილის გაგრძელებას კითხულობს თუ არა."""
+    with open(filename, mode='rb') as f:
+        stat = os.fstat(f.fileno())
+        start = max(offset - FINGERPRINT_BYTES, 0)
+        f.seek(start)
+        window = f.read(offset - start)
+    return {"dev": stat.st_dev, "ino": stat.st_ino, "fingerprint": hashlib.sha1(window).hexdigest()}
+
+
+def write_json(filename, data, indent=2):
+    """ჯერ პროცესის საკუთარ დროებით ფაილში, შემდეგ os.replace - შეწყვეტისას ფაილი არ
+    ზიანდება, წამკითხველი კი ყოველთვის სრულ JSON-ს ხედავს."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_file = tempfile.mkstemp(prefix=os.path.basename(filename), suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, mode='w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        os.replace(tmp_file, filename)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+class StaleCursorError(ValueError):
+    """კურსორი აღარ ემთხვევა ფაილს (ფაილი შემცირდა ან თავიდან დაიწერა)."""
+
+
+class ChangeFeed:
+    """cursor - ბოლო changes() გავლის მიერ წაკითხული ნაწილის საზღვარი, გამოტოვებული
+    (დაზიანებული) ხაზების ჩათვლით; ბოლო ჩანაწერის კურსორზე შეიძლება წინ იყოს."""
+
+    def __init__(self, filename, cursor_file=None):
+        self.filename = filename
+        self.cursor_file = cursor_file or filename + ".cursors.json"
+        self.cursor = None
+
+    # ------------------------------------------------------------------
+    # კურსორები
+    # ------------------------------------------------------------------
+    def initial_cursor(self):
+        """კურსორი სათაურის შემდეგ - ყველა ჩანაწერი ჯერ წაუკითხავია."""
+        with open(self.filename, mode='rb') as f:
+            header = f.readline()
+        return (len(header) if header.endswith(b"\n") else 0, 0)
+
+    def _load_cursors(self):
+        if not os.path.exists(self.cursor_file):
+            return {}
+        with open(self.cursor_file, mode='r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_cursor(self, consumer):
+        """მომხმარებლის შენახული კურსორი; ახალ მომხმარებელს - initial_cursor().
+
+        StaleCursorError, თუ კურსორის შენახვის შემდეგ ფაილი შეიცვალა (სხვა inode ან
+        offset-მდე ნაწილი სხვაა). ძველი ფორმატის კურსორები (inode-ის გარეშე) არ მოწმდება.
+        """
+        saved = self._load_cursors().get(consumer)
+        if saved is None:
+            return self.initial_cursor()
+        cursor = (saved["offset"], saved["rows"])
+        if "ino" in saved:
+            identity = file_identity(self.filename, cursor[0])
+            if (saved["dev"], saved["ino"]) != (identity["dev"], identity["ino"]):
+                raise StaleCursorError(f"'{consumer}'-ის კურსორის შენახვის შემდეგ ფაილი ჩანაცვლდა (სხვა inode)")
+            if saved["fingerprint"] != identity["fingerprint"]:
+                raise StaleCursorError(f"'{consumer}'-ის კურსორის შენახვის შემდეგ ფაილი თავიდან დაიწერა")
+        return cursor
+
+    def save_cursor(self, consumer, cursor):
+        """ინახავს მომხმარებლის კურსორს; სხვა მომხმარებლების კურსორები უცვლელი რჩება.
+
+        წაკითხვა-შეცვლა-ჩაწერა სრულდება ბლოკირების ფაილის (cursor_file + ".lock") flock-ით,
+        ამიტომ ერთდროულად მომუშავე მომხმარებლები ერთმანეთის კურსორს არ გადაფარავენ.
+        """
+        with open(self.cursor_file + ".lock", mode='a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            cursors = self._load_cursors()
+            cursors[consumer] = dict(file_identity(self.filename, cursor[0]), offset=cursor[0], rows=cursor[1])
+            write_json(self.cursor_file, cursors)
+
+    # ------------------------------------------------------------------
+    # ცვლილებების წაკითხვა
+    # ------------------------------------------------------------------
+    def changes(self, cursor=None):
+        """აბრუნებს (Record, კურსორი ამ ჩანაწერის შემდეგ) წყვილებს cursor-ის შემდეგ დამატებული ხაზებისთვის.
+
+        ბოლო დაუსრულებელი ხაზი (ჩაწერა ჯერ მიმდინარეობს) გამოიტოვება და შემდეგ გამოძახებაზე წაიკითხება.
+        დაზიანებული ხაზები გამოიტოვება, თუმცა კურსორი მათ მაინც გადაცდება.
+        """
+        offset, rows = cursor if cursor is not None else self.initial_cursor()
+        self.cursor = (offset, rows)
+        with open(self.filename, mode='rb') as f:
+            header_line = f.readline()
+            # ცარიელი ფაილი ან სათაური ჯერ ბოლომდე არ ჩაწერილა - წასაკითხი არაფერია
+            if not header_line.endswith(b"\n"):
+                return
+            header = next(csv.reader([header_line.decode('utf-8')]), [])
+            if not header:
+                return
+            # სათაურამდე მიმართული კურსორი = თავიდან კითხვა
+            offset = max(offset, f.tell())
+            self.cursor = (offset, rows)
+            size = os.fstat(f.fileno()).st_size
+            if offset > size:
+                raise StaleCursorError(f"კურსორი ({offset}) ფაილის ზომაზე ({size}) დიდია")
+            f.seek(offset - 1)
+            if f.read(1) != b"\n":
+                raise StaleCursorError(f"კურსორი ({offset}) ხაზის საზღვარზე არ არის")
+
+            record_reader = RecordReader(header)
+            pending = b""
+            for line in f:
+                pending += line
+                # ბრჭყალების კენტი რაოდენობა = ველი შემდეგ ხაზზე გრძელდება
+                if not line.endswith(b"\n") or pending.count(b'"') % 2:
+                    continue
+                offset += len(pending)
+                rows += 1
+                self.cursor = (offset, rows)
+                row = next(csv.reader([pending.decode('utf-8', errors='replace')]), [])
+                pending = b""
+                record = record_reader.from_row(row)
+                if record is not None:
+                    yield record, (offset, rows)
+
+    def follow(self, cursor=None, poll_interval=1.0):
+        """changes()-ის უსასრულო ვერსია: ახალი ხაზების მოლოდინში ბლოკავს."""
+        cursor = cursor if cursor is not None else self.initial_cursor()
+        watcher = None
+        if INotify is not None:
+            watcher = INotify()
+            watcher.add_watch(self.filename, flags.MODIFY)
+        try:
+            while True:
+                for record, cursor in self.changes(cursor):
+                    yield record, cursor
+                # ბოლოში გამოტოვებული დაზიანებული ხაზები თავიდან აღარ წაიკითხება
+                cursor = self.cursor
+                if watcher is not None:
+                    watcher.read(timeout=int(poll_interval * 1000))
+                else:
+                    time.sleep(poll_interval)
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+
+def event_dict(record, cursor):
+    """ცვლილება JSON-ისთვის: ჩანაწერის ველები + კურსორი, რომლითაც შემდეგი წაკითხვა გაგრძელდება."""
+    event = record.to_dict()
+    event["cursor"] = {"offset": cursor[0], "rows": cursor[1]}
+    return event
@@ -168,3 +168,9 @@ discount_table = {
     4: 20,
     5: 25
 }
+
+
+def discount_percent(count, table=discount_table):
+    """ფასდაკლების პროცენტი საგნების რაოდენობის მიხედვით (ცხრილის ბოლო საფეხური ვრცელდება ზემოთაც)."""
+    top = max(table)
+    return table[top] if count > top else table.get(count, 0)
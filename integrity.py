@@ -0,0 +1,239 @@
+# integrity.py
+
+# რეესტრის მთლიანობის შემოწმება (fsck) ორ ეტაპად.
+# 1. ფაილი იყოფა მთელი ჩანაწერების ნაწილებად (records.line_chunks); თითო ნაწილს ცალკე
+#    პროცესი პარსავს და ამოწმებს ხაზის დონის წესებს (სვეტები, სტატუსი, დრო, UTF-8, კურსი).
+# 2. ნაწილების შედეგებიდან მხოლოდ კომპაქტური (სტუდენტი, კურსი, სტატუსი, ქვითარი) ნაკადი
+#    გადის თანმიმდევრულ შემოწმებას (ობოლი გაუქმებები, გადავსება, ქვითრების ხელახალი გამოყენება).
+# ხაზები მეხსიერებაში არ ინახება - ერთდროულად მუშავდება რამდენიმე ნაწილი. მეორე ეტაპის
+# მდგომარეობა კი ფაილის ზომაზე კი არა, აქტიური ჩაწერების და განსხვავებული ქვითრების
+# რაოდენობაზეა დამოკიდებული: სტუდენტი ინახება ჰეშით, ამიტომ ქვითარზე რამდენიმე ათეული ბაიტი მოდის.
+# შესაძლებელია გასწორებული ასლის ჩაწერა.
+
+import csv
+import io
+import mmap
+import os
+import re
+import sys
+from collections import deque
+from operator import itemgetter
+
+from records import FIELDS, SCAN_CHUNK_SIZE, line_chunks
+
+STATUSES = ("Active", "Cancelled")
+# TIMESTAMP_FORMAT-ის ფორმა; regex ყოველ ხაზზე strptime-ზე ბევრად იაფია
+TIMESTAMP_RE = re.compile(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d")
+
+# დარღვევების სახეები
+MALFORMED = "malformed"
+ORPHAN_CANCEL = "orphan_cancel"
+OVER_CAPACITY = "over_capacity"
+RECEIPT_REUSED = "receipt_reused"
+UNKNOWN_COURSE = "unknown_course"
+
+
+def _check_chunk(task):
+    """პირველი ეტაპი ერთ ნაწილზე (ცალკე პროცესში).
+
+    აბრუნებს (ხაზების რაოდენობა, ჩანაწერების რაოდენობა, დარღვევები, მოვლენები, ასლი):
+    დარღვევები - (ხაზი ნაწილში, სახე, შეტყობინება); მოვლენები - სვეტები (ხაზი, სტუდენტი,
+    კურსი, Active თუ არა, ქვითარი) ვალიდური ჩანაწერებისთვის; ასლი - (ტექსტი, თითო მოვლენის
+    ბოლო პოზიცია ტექსტში) ან None, თუ გასწორებული ასლი არ იწერება.
+    """
+    filename, start, end, width, reorder, known_courses, repair = task
+    with open(filename, mode='rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    reader = csv.reader(io.StringIO(data.decode('utf-8', errors='replace'), newline=''))
+    valid_timestamp = TIMESTAMP_RE.fullmatch
+    intern = sys.intern
+    violations = []
+    lines, students, courses, actives, receipts = [], [], [], [], []
+    buffer = writer = ends = None
+    if repair:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        ends = []
+
+    rows = 0
+    line = reader.line_num
+    for row in reader:
+        start_line, line = line + 1, reader.line_num
+        rows += 1
+        if len(row) != width:
+            violations.append((start_line, MALFORMED, f"სვეტების რაოდენობა {len(row)}, მოსალოდნელია {width}"))
+            continue
+        if reorder is not None:
+            row = [row[i] for i in reorder]
+        (name, surname, father_name, _, _, course_id, _, _,
+         status, receipt_id, timestamp) = row
+        problem = None
+        if not (name and surname and father_name and course_id):
+            problem = "ცარიელი სავალდებულო ველი"
+        elif status not in STATUSES:
+            problem = f"უცნობი სტატუსი '{status}'"
+        elif not valid_timestamp(timestamp):
+            problem = f"არასწორი დრო '{timestamp}'"
+        elif "\ufffd" in "".join(row):
+            problem = "არავალიდური UTF-8"
+        if problem:
+            violations.append((start_line, MALFORMED, problem))
+            continue
+        if course_id not in known_courses:
+            violations.append((start_line, UNKNOWN_COURSE, f"კურსი '{course_id}' არ არის courses_data-ში"))
+
+        lines.append(start_line)
+        students.append(f"{name}\0{surname}\0{father_name}")
+        # ერთი ობიექტი - pickle მას ნაწილში ერთხელ გადასცემს
+        courses.append(intern(course_id))
+        actives.append(status == "Active")
+        receipts.append(receipt_id)
+        if writer is not None:
+            writer.writerow(row)
+            ends.append(buffer.tell())
+
+    copy = (buffer.getvalue(), ends) if repair else None
+    return line, rows, violations, (lines, students, courses, actives, receipts), copy
+
+
+class IntegrityChecker:
+    """check() აბრუნებს დარღვევების ნაკადს: {"line", "kind", "message"}.
+
+    გასწორებულ ასლში არ გადადის დაზიანებული ხაზები (არცერთ მოთხოვნაში არ მონაწილეობენ)
+    და ობოლი გაუქმებები (მდგომარეობას არ ცვლიან). დანარჩენი დარღვევები მხოლოდ რეპორტში
+    ჩანს - მათი გასწორება ადმინისტრატორის გადაწყვეტილებაა.
+
+    ქვითარი ხელახლა გამოყენებულად ითვლება, თუ მას სხვა სტუდენტი იყენებს, ან იგივე სტუდენტი
+    მას უბრუნდება მას შემდეგ, რაც გადახდა დაიხურა (მისი გაუქმებით ან სხვა ქვითრით). სხვა
+    მაგიდის ხაზი გადახდის შუაში დარღვევა არ არის.
+
+    workers - პირველი ეტაპის პროცესების რაოდენობა (ნაგულისხმევად os.cpu_count(); 1 - იმავე
+    პროცესში). გავლის შემდეგ rows და counts შეიცავს შემოწმებული ხაზების და დარღვევების
+    რაოდენობას, repaired კი - გასწორებული ასლის ფაილს, თუ ის ბოლომდე ჩაიწერა.
+    """
+
+    def __init__(self, courses, workers=None, chunk_size=SCAN_CHUNK_SIZE):
+        self.capacity = {course["id"]: course["capacity"] for course in courses}
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self.counts = dict.fromkeys((MALFORMED, ORPHAN_CANCEL, OVER_CAPACITY, RECEIPT_REUSED, UNKNOWN_COURSE), 0)
+        self.repaired = None
+
+    def _violation(self, line, kind, message):
+        self.counts[kind] += 1
+        return {"line": line, "kind": kind, "message": message}
+
+    def check(self, filename, repaired_filename=None):
+        self.repaired = None
+        with open(filename, mode='rb') as f:
+            header_line = f.readline()
+            header = next(csv.reader([header_line.decode('utf-8', errors='replace')]), None)
+            missing = [field for field in FIELDS if field not in (header or ())]
+            if missing:
+                yield self._violation(1, MALFORMED, f"სათაურში აკლია ველები: {', '.join(missing)}")
+                return
+            positions = [header.index(field) for field in FIELDS]
+            reorder = None if positions == list(range(len(header))) else positions
+            size = os.fstat(f.fileno()).st_size
+
+            out = None
+            if repaired_filename is not None:
+                out = open(repaired_filename, mode='w', newline='', encoding='utf-8')
+                csv.writer(out).writerow(FIELDS)
+            try:
+                known_courses = frozenset(self.capacity)
+                chunks = []
+                if size > len(header_line):
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        chunks = list(line_chunks(mm, len(header_line), size, self.chunk_size, whole_records=True))
+                tasks = ((filename, start, end, len(header), reorder, known_courses, out is not None)
+                         for start, end in chunks)
+                self._reset_state()
+                line = 1
+                for result in self._map(tasks):
+                    yield from self._check_sequence(result, line, out)
+                    line += result[0]
+            finally:
+                if out is not None:
+                    out.close()
+            self.repaired = repaired_filename
+
+    def _map(self, tasks):
+        """_check_chunk-ის შედეგები ნაწილების რიგით; მეხსიერებაში ერთდროულად მხოლოდ რამდენიმე ნაწილია."""
+        if self.workers == 1:
+            yield from map(_check_chunk, tasks)
+            return
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(self.workers) as executor:
+            pending = deque()
+            for task in tasks:
+                pending.append(executor.submit(_check_chunk, task))
+                if len(pending) > self.workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _reset_state(self):
+        self._active = set()  # (სტუდენტი, course_id)-ის ჰეში
+        self._occupancy = dict.fromkeys(self.capacity, 0)
+        self._receipts = {}  # ქვითრის ჰეში -> სტუდენტის ჰეში, რომელმაც ის პირველად გამოიყენა
+        self._open_receipts = {}  # სტუდენტის ჰეში -> მისი ღია გადახდის ქვითრის ჰეში
+
+    def _check_sequence(self, result, first_line, out):
+        """მეორე ეტაპი ერთი ნაწილის მოვლენებზე; დარღვევები ბრუნდება ხაზების რიგით."""
+        _, rows, found, events, copy = result
+        self.rows += rows
+        capacity = self.capacity
+        active = self._active
+        occupancy = self._occupancy
+        receipts = self._receipts
+        open_receipts = self._open_receipts
+        found = list(found)
+        dropped = []
+
+        for i, (line, student, course_id, is_active, receipt_id) in enumerate(zip(*events)):
+            # მდგომარეობაში მხოლოდ 64-ბიტიანი ჰეშები ინახება: სტრიქონებზე და tuple-ებზე
+            # რამდენჯერმე ნაკლები მეხსიერება, ხოლო დამთხვევის ალბათობა უმნიშვნელოა
+            student = hash(student)
+            key = hash((student, course_id))
+            receipt = hash(receipt_id)
+            if is_active:
+                if open_receipts.get(student) != receipt:
+                    owner = receipts.get(receipt)
+                    if owner is None:
+                        receipts[receipt] = student
+                    elif owner != student:
+                        found.append((line, RECEIPT_REUSED, f"ქვითარი '{receipt_id}' უკვე გამოყენებულია სხვა სტუდენტის მიერ"))
+                    else:
+                        found.append((line, RECEIPT_REUSED, f"ქვითარი '{receipt_id}' უკვე გამოყენებულია დახურულ გადახდაში"))
+                    open_receipts[student] = receipt
+                if key not in active:
+                    active.add(key)
+                    if course_id in capacity:
+                        occupancy[course_id] += 1
+                        if occupancy[course_id] > capacity[course_id]:
+                            found.append((line, OVER_CAPACITY,
+                                          f"კურსი '{course_id}' გადავსებულია: {occupancy[course_id]}/{capacity[course_id]}"))
+            else:
+                open_receipts.pop(student, None)
+                if key in active:
+                    active.discard(key)
+                    if course_id in capacity:
+                        occupancy[course_id] -= 1
+                else:
+                    dropped.append(i)
+                    found.append((line, ORPHAN_CANCEL, f"გაუქმებას არ აქვს შესაბამისი Active ჩანაწერი (კურსი '{course_id}')"))
+
+        # sorted სტაბილურია: ერთ ხაზზე პირველი ეტაპის დარღვევა (უცნობი კურსი) წინ რჩება
+        for line, kind, message in sorted(found, key=itemgetter(0)):
+            yield self._violation(first_line + line, kind, message)
+
+        if out is not None:
+            text, ends = copy
+            start = 0
+            for i in dropped:
+                out.write(text[start:ends[i - 1] if i else 0])
+                start = ends[i]
+            out.write(text[start:])
@@ -1,11 +1,19 @@
 import csv
+import gc
+import mmap
 import os
 import re
+import sys
 from datetime import datetime
 from collections import defaultdict
-from courses_data import university_prep_data, discount_table
+from courses_data import university_prep_data, discount_percent
+from records import RecordReader, TIMESTAMP_FORMAT, encode_timestamp, line_chunks
+from screen import COURSE_TABLE_HEADER, COURSE_TABLE_SEPARATOR, CourseTable, Frame
 
 DB_FILE = "students_registry.csv"
+EMAIL_REGEX = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+# ბაიტები, რომლებიც ბრჭყალების ლუწობის შემოწმებისას იშლება (რჩება მხოლოდ '"' და '\n')
+NON_QUOTE_BYTES = bytes(b for b in range(256) if b not in b'"\n')
 
 # =========================================================
 # 1. ვალიდაციის კლასი
@@ -15,6 +23,31 @@ class Validator:
     def is_georgian_text(text):
         return all('\u10d0' <= char <= '\u10fa' for char in text)
 
+    @staticmethod
+    def is_valid_name(value):
+        return len(value) >= 2 and Validator.is_georgian_text(value)
+
+    @staticmethod
+    def is_valid_phone(phone):
+        return phone.isdigit() and len(phone) == 9
+
+    @staticmethod
+    def is_valid_email(email):
+        return re.match(EMAIL_REGEX, email) is not None
+
+    @staticmethod
+    def check_student_info(student_info):
+        """არაინტერაქტიული შემოწმება: აბრუნებს შეცდომების სიას (ცარიელი = ვალიდურია)."""
+        errors = []
+        for field in ("name", "surname", "father_name"):
+            if not Validator.is_valid_name(str(student_info.get(field, "")).strip()):
+                errors.append(f"არავალიდური ველი '{field}': მინიმუმ 2 ქართული სიმბოლო.")
+        if not Validator.is_valid_phone(str(student_info.get("phone", "")).strip()):
+            errors.append("ნომერი უნდა შედგებოდეს 9 ციფრისგან.")
+        if not Validator.is_valid_email(str(student_info.get("email", "")).strip()):
+            errors.append("ელ-ფოსტის არასწორი ფორმატი.")
+        return errors
+
     @staticmethod
     def validate_name_field(prompt):
         while True:
@@ -31,16 +64,15 @@ class Validator:
     def validate_phone():
         while True:
             phone = input("მობილურის ნომერი (9 ციფრი): ").strip()
-            if phone.isdigit() and len(phone) == 9:
+            if Validator.is_valid_phone(phone):
                 return phone
             print("❌ შეცდომა: ნომერი უნდა შედგებოდეს 9 ციფრისგან.")
 
     @staticmethod
     def validate_email():
-        regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
         while True:
             email = input("ელ-ფოსტა: ").strip()
-            if re.match(regex, email):
+            if Validator.is_valid_email(email):
                 return email
             print("❌ შეცდომა: არასწორი ფორმატი.")
 
@@ -50,6 +82,20 @@ class Validator:
 class StudentDatabase:
     def __init__(self, filename):
         self.filename = filename
+        # მეხსიერებაში ჩატვირთული წარმოდგენები; იგება პირველ საჭიროებაზე და შემდეგ
+        # ახლდება მხოლოდ ფაილის ბოლოში დამატებული ხაზებით (იხ. refresh)
+        self._live_state = None
+        self._name_index = None
+        self._timeline_index = None
+        self._capacity_stats = None
+        # (st_dev, st_ino, offset, rows) - ფაილის რა ნაწილს ასახავს ჩატვირთული წარმოდგენები
+        self._tail = None
+        # გამოიძახება წარმოდგენის ჩატვირთვის ან ზრდის შემდეგ (მაგ. branches.BranchHost-ის მეხსიერების ლიმიტისთვის)
+        self.on_views_changed = None
+        # (_tail, უარების offset) ბოლოს შენახული შევსების სტატისტიკისთვის (იხ. get_capacity_stats)
+        self._capacity_saved_at = None
+        # (inode, შემოწმებული ბაიტების რაოდენობა, მოიძებნა თუ არა მრავალხაზიანი ჩანაწერი)
+        self._multiline_check = (None, 0, False)
         self._init_db()
 
     def _init_db(self):
@@ -66,7 +112,7 @@ class StudentDatabase:
             writer = csv.writer(f)
             time_keys_str = ";".join(course["time_keys"]) if isinstance(course["time_keys"], list) else course["time_keys"]
             
-            writer.writerow([
+            row = [
                 student_info["name"],
                 student_info["surname"],
                 student_info["father_name"],
@@ -77,64 +123,440 @@ class StudentDatabase:
                 time_keys_str,
                 status,
                 receipt_id,
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            ])
+                datetime.now().strftime(TIMESTAMP_FORMAT)
+            ]
+            writer.writerow(row)
+        # ჩატვირთული წარმოდგენები ამ ხაზს შემდეგ მოთხოვნაზე refresh()-ით მიიღებენ,
+        # ისევე როგორც სხვა სამუშაო ადგილების მიერ დამატებულ ხაზებს
+
+    # ------------------------------------------------------------------
+    # ფაილის ბოლოს თვალყურის დევნება (tail-following)
+    # ------------------------------------------------------------------
+    def _views(self):
+        views = (self._live_state, self._name_index, self._timeline_index, self._capacity_stats)
+        return [view for view in views if view is not None]
+
+    def _drop_views(self):
+        self._live_state = self._name_index = self._timeline_index = self._capacity_stats = None
+        self._tail = None
+
+    def loaded_views(self):
+        """{ჩატვირთული წარმოდგენის სახელი: footprint()} - მეხსიერების შესაფასებლად (იხ. branches.py)."""
+        views = (("live_state", self._live_state), ("name_index", self._name_index),
+                 ("timeline", self._timeline_index), ("capacity", self._capacity_stats))
+        return {name: view.footprint() for name, view in views if view is not None}
+
+    def _views_changed(self):
+        if self.on_views_changed is not None:
+            self.on_views_changed()
+
+    def refresh(self):
+        """ჩატვირთულ წარმოდგენებში ასახავს მხოლოდ ბოლო წაკითხვის შემდეგ დამატებულ ხაზებს.
+
+        თუ ფაილი შემცირდა ან თავიდან დაიწერა (სხვა inode), წარმოდგენები იშლება და
+        შემდეგ მოთხოვნაზე სრულად იტვირთება.
+        """
+        if self._tail is None:
+            return
+        dev, ino, offset, rows = self._tail
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            # წარმოდგენები უკვე ცარიელი ფაილიდანაა აგებული (იხ. _load_view)
+            if ino is not None:
+                self._drop_views()
+            return
+        if (stat.st_dev, stat.st_ino) != (dev, ino) or stat.st_size < offset:
+            self._drop_views()
+            return
+        if stat.st_size == offset:
+            return
+
+        from change_feed import ChangeFeed, StaleCursorError
+        feed = ChangeFeed(self.filename)
+        try:
+            records = [record for record, _ in feed.changes((offset, rows))]
+        except StaleCursorError:
+            self._drop_views()
+            return
+        if records:
+            for view in self._views():
+                view.add_records(records)
+            self._views_changed()
+        # feed.cursor გადაცდება ბოლოში გამოტოვებულ დაზიანებულ ხაზებსაც - ყოველ მოთხოვნაზე თავიდან აღარ იკითხება
+        offset, rows = feed.cursor
+        self._tail = (dev, ino, offset, rows)
+
+    def _iter_records_until(self, end, position):
+        """iter_records-ის ვარიანტი, რომელიც წყდება end ბაიტზე (end=None - ფაილის მიმდინარე ზომა).
+
+        position სიაში იწერება [st_dev, st_ino, წაკითხული ბაიტები, ხაზები]. კითხულობს მხოლოდ
+        დასრულებულ ხაზებს, რომ ყველა წარმოდგენა ფაილის ერთსა და იმავე ნაწილს ასახავდეს.
+        """
+        if not os.path.exists(self.filename): return
+        with open(self.filename, mode='rb') as f:
+            stat = os.fstat(f.fileno())
+            position[:] = [stat.st_dev, stat.st_ino, 0, 0]
+            if end is None:
+                end = stat.st_size
+
+            def lines():
+                for line in f:
+                    if position[2] + len(line) > end or not line.endswith(b"\n"):
+                        return
+                    position[2] += len(line)
+                    yield line.decode('utf-8', errors='replace')
+
+            def rows(reader):
+                for row in reader:
+                    position[3] += 1
+                    yield row
+
+            reader = csv.reader(lines())
+            header = next(reader, None)
+            if header is None: return
+            yield from RecordReader(header).from_rows(rows(reader))
+
+    def _load_view(self, build):
+        """აგებს ახალ წარმოდგენას ფაილის იმავე ნაწილზე, რომელსაც უკვე ჩატვირთული წარმოდგენები ასახავს."""
+        self.refresh()
+        position = []
+        end = self._tail[2] if self._tail is not None else None
+        # Record-ები ციკლურ მიმართვებს არ ქმნიან (იხ. get_all_records)
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            view = build(self._iter_records_until(end, position))
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        if self._tail is None:
+            # ფაილი არ არსებობს: წარმოდგენა ცარიელია, ხოლო (None, None) inode-ს refresh() ფაილის
+            # გაჩენისას ცვლილებად ჩათვლის და წარმოდგენებს თავიდან ააგებს
+            self._tail = tuple(position) if position else (None, None, 0, 0)
+        return view
+
+    def _set_view(self, attribute, view):
+        setattr(self, attribute, view)
+        self._views_changed()
+        return view
+
+    def get_live_state(self):
+        """მიმდინარე მდგომარეობა (დაკავებულობა, აქტიური კურსები, ქვითრები); ახლდება refresh()-ით."""
+        self.refresh()
+        if self._live_state is None:
+            from registry_state import RegistryState
+            self._set_view("_live_state", self._load_view(RegistryState.from_records))
+        return self._live_state
+
+    def get_name_index(self):
+        """სახელების ინდექსი (იგება პირველ გამოძახებაზე, შემდეგ ახლდება refresh()-ით)."""
+        self.refresh()
+        if self._name_index is None:
+            from student_index import StudentIndex
+            if self._live_state is not None:
+                # ცოცხალ მდგომარეობას უკვე აქვს ყველა სტუდენტი იმავე ხაზამდე - რეესტრს თავიდან არ ვკითხულობთ
+                self._set_view("_name_index", StudentIndex.from_keys(self._live_state.student_keys()))
+            else:
+                self._set_view("_name_index", self._load_view(StudentIndex.from_records))
+        return self._name_index
+
+    def get_timeline_index(self):
+        """დროითი ინდექსი "as of" მოთხოვნებისთვის (იგება პირველ გამოძახებაზე, შემდეგ ახლდება refresh()-ით)."""
+        self.refresh()
+        if self._timeline_index is None:
+            from timeline_index import TimelineIndex
+            self._set_view("_timeline_index", self._load_view(TimelineIndex.from_records))
+        return self._timeline_index
+
+    # ------------------------------------------------------------------
+    # "ჯგუფი შევსებულია" უარების ჟურნალი (შევსების ანალიტიკისთვის)
+    # ------------------------------------------------------------------
+    @property
+    def rejections_file(self):
+        return self.filename + ".rejections.csv"
+
+    def add_rejection(self, course_id):
+        """ინახავს უარს სავსე ჯგუფზე რეგისტრაციის მცდელობისას."""
+        is_new = not os.path.exists(self.rejections_file)
+        with open(self.rejections_file, mode='a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(["course_id", "timestamp"])
+            writer.writerow([course_id, datetime.now().strftime(TIMESTAMP_FORMAT)])
+
+    def _read_rejections(self, offset):
+        """აბრუნებს ([(course_id, ts), ...], ახალი offset) offset-ის შემდეგ დასრულებული ხაზებისთვის."""
+        if not os.path.exists(self.rejections_file):
+            return [], 0
+        rejections = []
+        with open(self.rejections_file, mode='rb') as f:
+            if os.fstat(f.fileno()).st_size < offset:
+                return None, 0
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                row = line.decode('utf-8', errors='replace').rstrip("\r\n").split(",")
+                if len(row) == 2 and row[0] != "course_id":
+                    rejections.append((row[0], encode_timestamp(row[1])))
+        return rejections, offset
+
+    @property
+    def capacity_stats_file(self):
+        return self.filename + ".capacity.json"
+
+    def _restore_capacity_stats(self, courses):
+        """წინა პროცესის შენახული სტატისტიკა, მიყვანილი ჩატვირთული წარმოდგენების საზღვრამდე.
+
+        None, თუ ფაილი არ არსებობს ან გამოუსადეგარია: რეესტრი ან უარების ჟურნალი შენახვის
+        შემდეგ ბოლოში გაზრდის გარდა სხვაგვარად შეიცვალა (იხ. change_feed.file_identity),
+        ან ჯგუფების სია განსხვავდება.
+        """
+        import json
+        from analytics import CapacityStats
+        from change_feed import ChangeFeed, StaleCursorError, file_identity
+        try:
+            with open(self.capacity_stats_file, mode='r', encoding='utf-8') as f:
+                saved = json.load(f)
+            stats = CapacityStats.from_state(courses, saved["stats"])
+            registry = saved["registry"]
+            if file_identity(self.filename, registry["offset"]) != {key: registry[key] for key in ("dev", "ino", "fingerprint")}:
+                return None
+            if stats.rejections_offset and file_identity(self.rejections_file, stats.rejections_offset) != saved["rejections"]:
+                return None
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        cursor = (registry["offset"], registry["rows"])
+        if self._tail is None:
+            # სხვა წარმოდგენა ჩატვირთული არ არის: დანარჩენ ხაზებს refresh() წაიკითხავს
+            self._tail = (registry["dev"], registry["ino"]) + cursor
+            return stats
+        dev, ino, end, _ = self._tail
+        if (dev, ino) != (registry["dev"], registry["ino"]) or cursor[0] > end:
+            return None
+        records = []
+        try:
+            for record, position in ChangeFeed(self.filename).changes(cursor):
+                if position[0] > end:
+                    break
+                records.append(record)
+        except StaleCursorError:
+            return None
+        stats.add_records(records)
+        return stats
+
+    def _save_capacity_stats(self):
+        """ინახავს სტატისტიკას იმ offset-ებთან ერთად, რომლებამდეც ის რეესტრს და უარების ჟურნალს ასახავს."""
+        from change_feed import file_identity, write_json
+        dev, ino, offset, rows = self._tail
+        stats = self._capacity_stats
+        try:
+            registry = file_identity(self.filename, offset)
+            rejections = file_identity(self.rejections_file, stats.rejections_offset) if stats.rejections_offset else None
+        except OSError:
+            return
+        # ფაილი წარმოდგენების ჩატვირთვის შემდეგ ჩანაცვლდა - შემდეგი refresh() მათ თავიდან ააგებს
+        if (registry["dev"], registry["ino"]) != (dev, ino):
+            return
+        registry.update(offset=offset, rows=rows)
+        write_json(self.capacity_stats_file, {"registry": registry, "rejections": rejections, "stats": stats.to_state()},
+                   indent=None)
+
+    def get_capacity_stats(self, courses):
+        """ჯგუფების შევსების სტატისტიკა (analytics.CapacityStats); ახლდება refresh()-ით და უარების ჟურნალის ბოლოდან.
+
+        სტატისტიკა ინახება capacity_stats_file-ში, ამიტომ შემდეგი პროცესი რეესტრს თავიდან არ
+        კითხულობს - მხოლოდ შენახვის შემდეგ დამატებულ ხაზებს და უარებს.
+        """
+        self.refresh()
+        if self._capacity_stats is None:
+            stats = self._restore_capacity_stats(courses)
+            if stats is None:
+                from analytics import CapacityStats
+                stats = self._load_view(lambda records: CapacityStats.from_records(courses, records))
+            else:
+                self._capacity_saved_at = (self._tail, stats.rejections_offset)
+            self._set_view("_capacity_stats", stats)
+            self.refresh()
+            if self._capacity_stats is None:
+                # ფაილი ამ შუალედში თავიდან დაიწერა
+                return self.get_capacity_stats(courses)
+        stats = self._capacity_stats
+        rejections, offset = self._read_rejections(stats.rejections_offset)
+        if rejections is None:
+            # ჟურნალი შემცირდა - სტატისტიკა თავიდან იგება
+            self._capacity_stats = None
+            return self.get_capacity_stats(courses)
+        stats.add_rejections(rejections)
+        stats.rejections_offset = offset
+        if self._tail[1] is not None and (self._tail, offset) != self._capacity_saved_at:
+            self._save_capacity_stats()
+            self._capacity_saved_at = (self._tail, offset)
+        return stats
+
+    def iter_records(self):
+        """კითხულობს რეესტრს კომპაქტურ Record-ებად (იხ. records.py); დაზიანებული ხაზები გამოიტოვება."""
+        if not os.path.exists(self.filename): return
+        with open(self.filename, mode='r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None: return
+            yield from RecordReader(header).from_rows(reader)
+
+    # ------------------------------------------------------------------
+    # mmap წინასწარი ფილტრი: CSV პარსერი ეშვება მხოლოდ იმ ხაზებზე,
+    # რომლებშიც ბაიტების დონეზე მოიძებნა საძიებო ფრაგმენტი
+    # ------------------------------------------------------------------
+    def _has_multiline_records(self, mm, stat):
+        """ამოწმებს, ხომ არ გადადის რომელიმე ბრჭყალებიანი ველი შემდეგ ხაზზე.
+
+        ასეთი ხაზი ბრჭყალების კენტ რაოდენობას შეიცავს. ფაილი მხოლოდ ივსება ბოლოში,
+        ამიტომ ყოველ ჯერზე მოწმდება მხოლოდ წინა შემოწმების შემდეგ დამატებული ნაწილი.
+        """
+        inode, checked, found = self._multiline_check
+        if inode != stat.st_ino or checked > stat.st_size:
+            checked, found = 0, False
+
+        pos = checked
+        for start, end in ([] if found else line_chunks(mm, checked, stat.st_size)):
+            # წყვილი ბრჭყალები ხაზის შიგნით ქრება, კენტ ხაზზე ერთი '"' რჩება
+            found = b'"' in mm[start:end].translate(None, NON_QUOTE_BYTES).replace(b'""', b'')
+            pos = end
+            if found:
+                break
+
+        # ბოლო დაუსრულებელი ხაზი (თუ არის) შემდეგ ჯერზე თავიდან მოწმდება
+        complete = mm.rfind(b"\n", 0, stat.st_size) + 1
+        self._multiline_check = (stat.st_ino, min(pos, complete), found)
+        return found
+
+    def _prefiltered_records(self, needle):
+        """აბრუნებს Record-ებს იმ ხაზებიდან, რომლებიც შეიცავს needle-ს (bytes).
+
+        შედეგი შესაძლოა შეიცავდეს ზედმეტ ხაზებს - გამომძახებელი ველებს თავად ამოწმებს.
+        აბრუნებს None-ს, როცა სწრაფი გზა უსაფრთხო არ არის (მრავალხაზიანი ჩანაწერები).
+        """
+        if not os.path.exists(self.filename): return []
+        with open(self.filename, mode='rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size == 0: return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if self._has_multiline_records(mm, stat):
+                    return None
+
+                header_end = mm.find(b"\n")
+                if header_end == -1: return []
+                header = next(csv.reader([mm[:header_end].decode('utf-8')]))
+                record_reader = RecordReader(header)
+
+                records = []
+                pos = mm.find(needle, header_end)
+                while pos != -1:
+                    # ხაზი განისაზღვრება დამთხვევის ბოლო ბაიტით - needle შეიძლება '\n'-ით იწყებოდეს
+                    anchor = pos + len(needle) - 1
+                    line_start = mm.rfind(b"\n", 0, anchor) + 1
+                    line_end = mm.find(b"\n", anchor)
+                    if line_end == -1:
+                        line_end = len(mm)
+                    line = mm[line_start:line_end].decode('utf-8', errors='replace')
+                    record = record_reader.from_row(next(csv.reader([line]), []))
+                    if record is not None:
+                        records.append(record)
+                    pos = mm.find(needle, line_end)
+                return records
+
+    @staticmethod
+    def _csv_needle(*values):
+        """ველების ბაიტური ფრაგმენტი, როგორც csv.writer ჩაწერდა; None, თუ ველს ბრჭყალები სჭირდება."""
+        if any(ch in value for value in values for ch in ',"\r\n'):
+            return None
+        return ",".join(values).encode('utf-8')
 
     def check_receipt_exists(self, receipt_id):
         """ამოწმებს, არის თუ არა ქვითარი უკვე გამოყენებული."""
-        if not os.path.exists(self.filename): return False
-        with open(self.filename, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # ამოწმებს მხოლოდ Active სტატუსის მქონე ჩანაწერებს
-                if row["receipt_id"] == receipt_id and row["status"] == "Active":
-                    return True
+        self.refresh()
+        if self._live_state is not None:
+            return self._live_state.receipt_exists(receipt_id)
+        needle = self._csv_needle(receipt_id)
+        rows = self._prefiltered_records(b"," + needle + b",") if needle else None
+        if rows is None:
+            rows = self.iter_records()
+        for row in rows:
+            # ამოწმებს მხოლოდ Active სტატუსის მქონე ჩანაწერებს
+            if row.receipt_id == receipt_id and row.status == "Active":
+                return True
         return False
 
     def get_all_records(self):
         """აბრუნებს DB-ის ყველა ჩანაწერს."""
-        if not os.path.exists(self.filename): return []
-        with open(self.filename, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            return list(reader)
+        # Record-ები ციკლურ მიმართვებს არ ქმნიან, ამიტომ მასობრივი ჩატვირთვისას
+        # GC-ის ხშირი გავლები ზრდად სიაზე მხოლოდ დროს ხარჯავს
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return list(self.iter_records())
+        finally:
+            if gc_was_enabled:
+                gc.enable()
 
     def get_student_history(self, name, surname, father_name):
+        self.refresh()
+        if self._live_state is not None:
+            return self._live_state.student_history((name, surname, father_name))
         active_courses = {}
-        if not os.path.exists(self.filename): return []
-
-        with open(self.filename, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if (row["name"] == name and row["surname"] == surname and row["father_name"] == father_name):
-                    if row["status"] == "Active":
-                        active_courses[row["course_id"]] = row
-                    elif row["status"] == "Cancelled":
-                        if row["course_id"] in active_courses:
-                            del active_courses[row["course_id"]]
+        # სახელი, გვარი და მამის სახელი ხაზის პირველი სამი ველია
+        needle = self._csv_needle(name, surname, father_name)
+        rows = self._prefiltered_records(b"\n" + needle + b",") if needle else None
+        if rows is None:
+            rows = self.iter_records()
+        for row in rows:
+            if (row.name == name and row.surname == surname and row.father_name == father_name):
+                if row.status == "Active":
+                    active_courses[row.course_id] = row
+                elif row.status == "Cancelled":
+                    if row.course_id in active_courses:
+                        del active_courses[row.course_id]
         return list(active_courses.values())
 
     def get_course_occupancy(self, course_id):
+        self.refresh()
+        if self._live_state is not None:
+            return self._live_state.course_occupancy(course_id)
         student_status_map = defaultdict(lambda: "None")
-        if not os.path.exists(self.filename): return 0
-        
-        with open(self.filename, mode='r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row["course_id"] == course_id:
-                    unique_key = (row["name"], row["surname"], row["father_name"])
-                    student_status_map[unique_key] = row["status"]
-                    
+        needle = self._csv_needle(course_id)
+        rows = self._prefiltered_records(b"," + needle + b",") if needle else None
+        if rows is None:
+            rows = self.iter_records()
+        for row in rows:
+            if row.course_id == course_id:
+                student_status_map[row.student_key] = row.status
+
         return sum(1 for status in student_status_map.values() if status == "Active")
 
+    def get_all_occupancies(self):
+        """ყველა კურსის დაკავებულობა: { course_id: აქტიური სტუდენტების რაოდენობა }."""
+        return self.get_live_state().all_occupancies()
+
+    def get_active_students(self):
+        """აქტიური სტუდენტები მიმდინარე მდგომარეობიდან.
+
+        აბრუნებს { (name, surname, father_name): {"phone", "email", "active_courses": [row, ...]} }
+        მხოლოდ იმ სტუდენტებისთვის, ვისაც აქვს მინიმუმ ერთი აქტიური კურსი.
+        """
+        return self.get_live_state().active_students()
+
 
 # =========================================================
 # 3. სისტემის ლოგიკა
 # =========================================================
 class RegistrationSystem:
-    def __init__(self):
-        self.db = StudentDatabase(DB_FILE)
-        self.courses = university_prep_data["subjects"]
-        self.base_price = university_prep_data["price_per_subject"]
+    def __init__(self, db_file=DB_FILE, catalog=university_prep_data):
+        self.db = StudentDatabase(db_file)
+        self.courses = catalog["subjects"]
+        self.base_price = catalog["price_per_subject"]
 
     def extract_subject_name(self, full_course_name):
         return full_course_name.split("(")[0].strip()
@@ -161,65 +583,157 @@ class RegistrationSystem:
         return None
 
     def calculate_prices(self, count):
-        disc_percent = discount_table.get(count, 25 if count > 5 else 0)
+        disc_percent = discount_percent(count)
         original = self.base_price
         discount_amt = original * (disc_percent / 100)
         final = original - discount_amt
         return original, disc_percent, final
 
-    def print_cart(self, cart):
+    def cart_lines(self, cart):
+        """კალათის ბლოკი ხაზების სიად (ბეჭდვის გარეშე)."""
         if not cart:
-            print("\n🛒 ამ ეტაპზე კურსი არ დამატებულა")
-            return
+            return ["\n🛒 ამ ეტაპზე კურსი არ დამატებულა"]
 
         count = len(cart)
         orig, perc, fin = self.calculate_prices(count)
         
-        print("\n🛒 თქვენი კალათა:")
-        print(f"{'ID':<4} | {'დასახელება':<30} | {'საწყისი':<8} | {'ფასდ.%':<6} | {'ფასი':<8}")
-        print("-" * 70)
+        lines = ["\n🛒 თქვენი კალათა:"]
+        lines.append(f"{'ID':<4} | {'დასახელება':<30} | {'საწყისი':<8} | {'ფასდ.%':<6} | {'ფასი':<8}")
+        lines.append("-" * 70)
         
         total_sum = 0
         for item in cart:
-            print(f"{item['id']:<4} | {item['name']:<30} | {orig:<8} | {perc:<6}% | {fin:<8.2f}")
+            lines.append(f"{item['id']:<4} | {item['name']:<30} | {orig:<8} | {perc:<6}% | {fin:<8.2f}")
             total_sum += fin
             
-        print("-" * 70)
-        print(f"სულ გადასახდელი (კალათა): {total_sum:.2f} GEL")
+        lines.append("-" * 70)
+        lines.append(f"სულ გადასახდელი (კალათა): {total_sum:.2f} GEL")
+        return lines
+
+    # ============================
+    # არაინტერაქტიული ოპერაციები (CLI ქვებრძანებებისთვის)
+    # ============================
+    def register_courses(self, student_info, course_ids, receipt):
+        """რეგისტრაცია input()-ის გარეშე, იგივე წესებით, რაც register_process-ში.
+
+        აბრუნებს (errors, summary). წარმატების შემთხვევაში errors ცარიელია.
+        """
+        errors = Validator.check_student_info(student_info)
+        receipt = str(receipt or "").strip()
+        if not receipt:
+            errors.append("გადახდის დამადასტურებელი დოკუმენტის ნომრის შეყვანა აუცილებელია.")
+        if not course_ids:
+            errors.append("კალათა ცარიელია! აირჩიეთ მინიმუმ 1 საგანი.")
+        if errors:
+            return errors, None
+
+        student_info = {k: str(student_info[k]).strip() for k in ("name", "surname", "father_name", "phone", "email")}
+        course_objects_map = {c["id"]: c for c in self.courses}
+        occupancy = self.db.get_all_occupancies()
+
+        cart = []
+        for course_id in course_ids:
+            course = course_objects_map.get(str(course_id))
+            if not course:
+                errors.append(f"არასწორი ID: {course_id}")
+                continue
+            if occupancy.get(course["id"], 0) >= course["capacity"]:
+                self.db.add_rejection(course["id"])
+                errors.append(f"ჯგუფი შევსებულია: {course['id']}")
+                continue
+            if course in cart:
+                errors.append(f"კურსი {course['id']} ორჯერაა მითითებული.")
+                continue
+            conflict_error = self.check_conflicts([], course, cart)
+            if conflict_error:
+                errors.append(conflict_error)
+                continue
+            cart.append(course)
+
+        history = self.db.get_student_history(student_info["name"], student_info["surname"], student_info["father_name"])
+        for item in cart:
+            err = self.check_conflicts(history, item, [])
+            if err:
+                errors.append(err)
+
+        if self.db.check_receipt_exists(receipt):
+            errors.append("დოკუმენტის ეს ნომერი უკვე გამოყენებულია სისტემაში!")
+        if errors:
+            return errors, None
+
+        total_subjects = len(history) + len(cart)
+        _, percent, final_item_price = self.calculate_prices(total_subjects)
+
+        for item in cart:
+            self.db.add_record(student_info, item, receipt, status="Active")
+
+        return [], {
+            "receipt_id": receipt,
+            "course_ids": [c["id"] for c in cart],
+            "existing_subjects": len(history),
+            "discount_percent": percent,
+            "price_per_subject": final_item_price,
+            "total": final_item_price * len(cart),
+        }
+
+    def cancel_courses(self, name, surname, father_name, course_ids):
+        """აუქმებს სტუდენტის აქტიურ კურსებს (ისე, როგორც edit_registration-ის 'del').
+
+        აბრუნებს (errors, cancelled_course_ids).
+        """
+        history = {row["course_id"]: row for row in self.db.get_student_history(name, surname, father_name)}
+        if not history:
+            return [f"სტუდენტი {name} {surname} {father_name} არ არის რეგისტრირებული აქტიურ კურსებზე."], []
+
+        errors = [f"კურსი {cid} არ არის აქტიური." for cid in course_ids if str(cid) not in history]
+        if errors:
+            return errors, []
+
+        course_objects_map = {c["id"]: c for c in self.courses}
+        cancelled = []
+        for course_id in dict.fromkeys(str(cid) for cid in course_ids):
+            record = history[course_id]
+            course = course_objects_map.get(course_id, {
+                "id": course_id, "name": record["course_name"], "time_keys": record["time_keys"]
+            })
+            student_info = {
+                "name": name, "surname": surname, "father_name": father_name,
+                "phone": record["phone"], "email": record["email"]
+            }
+            self.db.add_record(student_info, course, record["receipt_id"], status="Cancelled")
+            cancelled.append(course_id)
+        return [], cancelled
 
     # ============================
     # მთავარი პროცესი (register_process)
     # ============================
     def register_process(self):
         cart = []
+        cart_ids = set()
         last_message = ""
+        course_table = CourseTable(self.courses)
+        frame = Frame()
         
         while True:
-            print("\n" * 2) 
-            print("=== 1. კურსების არჩევა ===")
+            frame.line("\n" * 2) 
+            frame.line("=== 1. კურსების არჩევა ===")
             
-            print(f"{'ID':<4} | {'დასახელება':<30} | {'დრო':<25} | {'სტატუსი'}")
-            print("-" * 85)
-            for course in self.courses:
-                occupied = self.db.get_course_occupancy(course["id"])
-                available = course["capacity"] - occupied
-                
-                status_icon = "✅" if available > 0 else "⛔ ჯგუფი შევსებულია"
-                in_cart_mark = " [კალათაშია]" if course in cart else ""
-                
-                print(f"{course['id']:<4} | {course['name']:<30} | {course['time_display']:<25} | {available}/{course['capacity']} {status_icon}{in_cart_mark}")
+            # დაკავებულობა ერთი გავლით მთელი ცხრილისთვის, თითო კურსზე ცალკე სკანირების ნაცვლად
+            occupancy = self.db.get_all_occupancies()
+            course_table.render(frame, occupancy, dict.fromkeys(cart_ids, " [კალათაშია]"))
             
-            self.print_cart(cart)
+            frame.lines(self.cart_lines(cart))
 
             if last_message:
-                print(f"\n📢 {last_message}")
+                frame.line(f"\n📢 {last_message}")
                 last_message = ""
 
-            print("\nინსტრუქცია:")
-            print("• კურსის ასარჩევად აკრიფეთ კურსის ID (მაგ.: 1)")
-            print("• არჩეული კურსის წასაშლელად აკრიფეთ 'del' და ID (მაგ.: del 1)")
-            print("• არჩევის ეტაპის დასასრულებლად აკრიფეთ 'F'")
-            print("• გასასვლელად აკრიფეთ 'X'")
+            frame.line("\nინსტრუქცია:")
+            frame.line("• კურსის ასარჩევად აკრიფეთ კურსის ID (მაგ.: 1)")
+            frame.line("• არჩეული კურსის წასაშლელად აკრიფეთ 'del' და ID (მაგ.: del 1)")
+            frame.line("• არჩევის ეტაპის დასასრულებლად აკრიფეთ 'F'")
+            frame.line("• გასასვლელად აკრიფეთ 'X'")
+            frame.flush()
             
             choice = input("\n>> თქვენი არჩევანი: ").strip().lower()
 
@@ -236,6 +750,7 @@ class RegistrationSystem:
                 to_remove = next((c for c in cart if c["id"] == del_id), None)
                 if to_remove:
                     cart.remove(to_remove)
+                    cart_ids.discard(to_remove["id"])
                     last_message = f"🗑️ კურსი '{to_remove['name']}' წაიშალა კალათიდან."
                 else:
                     last_message = "❌ ასეთი კურსი კალათაში არ არის."
@@ -248,10 +763,11 @@ class RegistrationSystem:
                 continue
 
             if self.db.get_course_occupancy(selected_course["id"]) >= selected_course["capacity"]:
+                self.db.add_rejection(selected_course["id"])
                 last_message = "❌ ჯგუფი შევსებულია!"
                 continue
 
-            if selected_course in cart:
+            if selected_course["id"] in cart_ids:
                 last_message = "⚠️ ეს კურსი უკვე კალათაშია."
                 continue
 
@@ -261,6 +777,7 @@ class RegistrationSystem:
                 continue
 
             cart.append(selected_course)
+            cart_ids.add(selected_course["id"])
             last_message = f"👍 '{selected_course['name']}' დაემატა კალათაში."
 
 
@@ -328,6 +845,27 @@ class RegistrationSystem:
         print("\n🎉 რეგისტრაცია წარმატებით დასრულდა!")
         input("დააჭირეთ Enter-ს მენიუში დასაბრუნებლად...")
 
+    def choose_student_candidate(self, name, surname, father_name):
+        """ზუსტი დამთხვევა თუ ვერ მოიძებნა, სთავაზობს მსგავს სტუდენტებს ინდექსიდან."""
+        candidates = [
+            key for key, _ in self.db.get_name_index().search(name, surname, father_name)
+            if key != (name, surname, father_name)
+        ]
+        if not candidates:
+            return None
+
+        print("\n🔎 ზუსტი დამთხვევა ვერ მოიძებნა. ხომ არ გულისხმობდით:")
+        for i, (c_name, c_surname, c_father_name) in enumerate(candidates, 1):
+            print(f"{i:<4} | {c_name} {c_surname} | {c_father_name}")
+
+        while True:
+            choice = input("\n>> აირჩიეთ ნომერი (ან Enter გასაუქმებლად): ").strip()
+            if not choice:
+                return None
+            if choice.isdigit() and 1 <= int(choice) <= len(candidates):
+                return candidates[int(choice) - 1]
+            print("❌ არასწორი ნომერი.")
+
     # ============================
     # რედაქტირების პროცესი (edit_registration უცვლელია)
     # ============================
@@ -340,6 +878,12 @@ class RegistrationSystem:
         father_name = Validator.validate_name_field("მამის სახელი: ")
 
         current_active_courses = self.db.get_student_history(name, surname, father_name)
+
+        if not current_active_courses:
+            candidate = self.choose_student_candidate(name, surname, father_name)
+            if candidate:
+                name, surname, father_name = candidate
+                current_active_courses = self.db.get_student_history(name, surname, father_name)
         
         if not current_active_courses:
             print(f"\n❌ სტუდენტი {name} {surname} {father_name} არ არის რეგისტრირებული აქტიურ კურსებზე.")
@@ -358,72 +902,57 @@ class RegistrationSystem:
 
         newly_added = []
         removed_courses = []
+        # id-ების სიმრავლეები მონიშვნებისა და შემოწმებებისთვის; სიები რიგს ინახავს ეკრანისთვის
+        active_ids = {c["id"] for c in active_cart}
+        new_ids = set()
+        removed_ids = set()
         last_message = ""
+        course_table = CourseTable(self.courses)
+        summary_table = CourseTable(self.courses)
+        frame = Frame()
         
         while True:
             # ეკრანის "გასუფთავება"
-            print("\n" * 2) 
-            print("=== 2. რეგისტრაციის რედაქტირება ===")
+            frame.line("\n" * 2) 
+            frame.line("=== 2. რეგისტრაციის რედაქტირება ===")
             
             # ------------------------------------------------------------------
-            # <<< ახალი კოდი: კურსების ჩამონათვალის ბეჭდვა >>>
+            # კურსების ჩამონათვალი (დაკავებულობა ერთი გავლით მთელი ეკრანისთვის)
             # ------------------------------------------------------------------
-            print("\n📚 არსებული კურსები:")
-            print(f"{'ID':<4} | {'დასახელება':<30} | {'დრო':<25} | {'სტატუსი'}")
-            print("-" * 85)
-            for course in self.courses:
-                occupied = self.db.get_course_occupancy(course["id"])
-                available = course["capacity"] - occupied
-                
-                status_icon = "✅" if available > 0 else "⛔ ჯგუფი შევსებულია"
-                
-                # ვამოწმებთ არის თუ არა ეს კურსი უკვე აქტიური ან ახალდამატებული
-                is_active = course["id"] in [c["id"] for c in active_cart if c not in removed_courses]
-                is_newly_added = course in newly_added
-                
-                status_mark = ""
-                if is_active:
-                    status_mark = " [რეგისტრირებული]"
-                elif is_newly_added:
-                    status_mark = " [დასამატებელი]"
-                    
-                print(f"{course['id']:<4} | {course['name']:<30} | {course['time_display']:<25} | {available}/{course['capacity']} {status_icon}{status_mark}")
+            occupancy = self.db.get_all_occupancies()
+            marks = dict.fromkeys(new_ids, " [დასამატებელი]")
+            marks.update(dict.fromkeys(active_ids - removed_ids, " [რეგისტრირებული]"))
+            frame.line("\n📚 არსებული კურსები:")
+            course_table.render(frame, occupancy, marks)
             # ------------------------------------------------------------------
             
             # 1. აქტიური/დასამატებელი კურსების შეჯამება (რომელიც ადრე იყო)
-            print("\n✅ რეგისტრირებული და დასამატებელი კურსები (ID-ების მითითება არ არის საჭირო):")
-            print(f"{'ID':<4} | {'დასახელება':<30} | {'დრო':<25} | {'სტატუსი'}")
-            print("-" * 85)
+            frame.line("\n✅ რეგისტრირებული და დასამატებელი კურსები (ID-ების მითითება არ არის საჭირო):")
+            frame.line(COURSE_TABLE_HEADER)
+            frame.line(COURSE_TABLE_SEPARATOR)
             
             for c in active_cart:
-                if c in removed_courses: continue
-                
-                occupied = self.db.get_course_occupancy(c["id"])
-                available = c["capacity"] - occupied
-                
-                status_icon = "✅" if available > 0 else "⛔ ჯგუფი შევსებულია"
-                print(f"{c['id']:<4} | {c['name']:<30} | {c['time_display']:<25} | {available}/{c['capacity']} {status_icon} [აქტიური]")
+                if c["id"] in removed_ids: continue
+                frame.line(summary_table.row(c, occupancy.get(c["id"], 0), " [აქტიური]"))
 
             for c in newly_added:
-                occupied = self.db.get_course_occupancy(c["id"])
-                available = c["capacity"] - occupied
-                status_icon = "✅" if available > 0 else "⛔ ჯგუფი შევსებულია"
-                print(f"{c['id']:<4} | {c['name']:<30} | {c['time_display']:<25} | {available}/{c['capacity']} {status_icon} [დასამატებელი]")
+                frame.line(summary_table.row(c, occupancy.get(c["id"], 0), " [დასამატებელი]"))
                 
-            self.print_cart(newly_added)
+            frame.lines(self.cart_lines(newly_added))
 
             if removed_courses:
-                print(f"\n🗑️ მონიშნულია გასაუქმებლად: {', '.join(c['name'] for c in removed_courses)}")
+                frame.line(f"\n🗑️ მონიშნულია გასაუქმებლად: {', '.join(c['name'] for c in removed_courses)}")
             
             if last_message:
-                print(f"\n📢 {last_message}")
+                frame.line(f"\n📢 {last_message}")
             last_message = "" 
 
-            print("\nინსტრუქცია:")
-            print("• კურსის დასამატებლად აკრიფეთ კურსის ID (მაგ.: 1) ")
-            print("• აქტიური/დასამატებელი კურსის გასაუქმებლად აკრიფეთ 'del' და ID (მაგ.: del 1)")
-            print("• რედაქტირების ეტაპის დასასრულებლად აკრიფეთ 'F'")
-            print("• გასასვლელად აკრიფეთ 'X'")
+            frame.line("\nინსტრუქცია:")
+            frame.line("• კურსის დასამატებლად აკრიფეთ კურსის ID (მაგ.: 1) ")
+            frame.line("• აქტიური/დასამატებელი კურსის გასაუქმებლად აკრიფეთ 'del' და ID (მაგ.: del 1)")
+            frame.line("• რედაქტირების ეტაპის დასასრულებლად აკრიფეთ 'F'")
+            frame.line("• გასასვლელად აკრიფეთ 'X'")
+            frame.flush()
             
             choice = input("\n>> თქვენი არჩევანი: ").strip().lower()
 
@@ -444,20 +973,24 @@ class RegistrationSystem:
                 to_remove_from_new = next((c for c in newly_added if c["id"] == del_id), None)
                 if to_remove_from_new:
                     newly_added.remove(to_remove_from_new)
+                    new_ids.discard(del_id)
                     last_message = f"🗑️ კურსი '{to_remove_from_new['name']}' წაიშალა დასამატებელთა სიიდან"
                     continue
 
-                to_remove_from_active_list = [c for c in active_cart if c not in removed_courses]
-                to_remove_from_active = next((c for c in to_remove_from_active_list if c["id"] == del_id), None)
+                to_remove_from_active = next(
+                    (c for c in active_cart if c["id"] == del_id and del_id not in removed_ids), None
+                )
                 
                 if to_remove_from_active:
                     removed_courses.append(to_remove_from_active)
+                    removed_ids.add(del_id)
                     last_message = f"❌ კურსი '{to_remove_from_active['name']}' მონიშნულია გასაუქმებლად"
                     continue
                 
                 to_reactivate = next((c for c in removed_courses if c["id"] == del_id), None)
                 if to_reactivate:
                     removed_courses.remove(to_reactivate)
+                    removed_ids.discard(del_id)
                     last_message = f"↩️ კურსი '{to_reactivate['name']}' აღარ არის მონიშნული გასაუქმებლად."
                     continue
                     
@@ -471,18 +1004,19 @@ class RegistrationSystem:
                 continue
 
             if self.db.get_course_occupancy(selected_course["id"]) >= selected_course["capacity"]:
+                self.db.add_rejection(selected_course["id"])
                 last_message = "❌ ჯგუფი შევსებულია!"
                 continue
 
-            if selected_course["id"] in [c["id"] for c in active_cart if c not in removed_courses]:
+            if selected_course["id"] in active_ids - removed_ids:
                 last_message = "⚠️ ეს კურსი უკვე რეგისტრირებულია!"
                 continue
                 
-            if selected_course in newly_added:
+            if selected_course["id"] in new_ids:
                 last_message = "⚠️ ეს კურსი უკვე დასამატებელთა სიაშია."
                 continue
 
-            active_for_check = [c for c in active_cart if c not in removed_courses]
+            active_for_check = [c for c in active_cart if c["id"] not in removed_ids]
             history_for_check = [{
                 "course_name": c["name"],
                 "time_keys": ";".join(c["time_keys"]) 
@@ -495,6 +1029,7 @@ class RegistrationSystem:
                 continue
 
             newly_added.append(selected_course)
+            new_ids.add(selected_course["id"])
             last_message = f"👍 '{selected_course['name']}' დაემატა დასამატებელთა სიაში."
 
         # --- ეტაპი 3: საბოლოო ანგარიში და გადახდა (მხოლოდ ახალი კურსებისთვის) ---
@@ -719,6 +1254,101 @@ class RegistrationSystem:
             input("\nდააჭირეთ Enter-ს მენიუში დასაბრუნებლად...")
 
         
+    def build_revenue_report(self):
+        from analytics import revenue_report
+        return revenue_report(self.db.get_all_records(), self.base_price)
+
+    def print_revenue_report(self, report):
+        print("\n📄 ქვითრების მიხედვით:")
+        print(f"{'გადახდ.N':<10} | {'სახელი გვარი':<25} | {'კურსები':<15} | {'სულ საგ.':<8} | {'ფასდ.%':<6} | {'თანხა':<8}")
+        print("-" * 90)
+        for r in report["receipts"]:
+            full_name = f"{r['name']} {r['surname']}"
+            print(f"{r['receipt_id']:<10} | {full_name:<25} | {', '.join(r['course_ids']):<15} | {r['subjects_total']:<8} | {r['discount_percent']:<6} | {r['billed']:<8.2f}")
+
+        print("\n📚 კურსების მიხედვით:")
+        print(f"{'ID':<4} | {'დასახელება':<30} | {'რეგისტრ.':<8} | {'თანხა':<10}")
+        print("-" * 60)
+        for course_id, c in report["courses"].items():
+            print(f"{course_id:<4} | {c['name']:<30} | {c['registrations']:<8} | {c['billed']:<10.2f}")
+
+        print("\n🏷️ ფასდაკლების საფეხურების მიხედვით:")
+        print(f"{'ფასდ.%':<6} | {'ქვითრები':<8} | {'საგნები':<8} | {'თანხა':<10}")
+        print("-" * 40)
+        for percent, t in report["tiers"].items():
+            print(f"{percent:<6} | {t['receipts']:<8} | {t['subjects']:<8} | {t['billed']:<10.2f}")
+
+        print("-" * 40)
+        print(f"სულ დარიცხული: {report['total']:.2f} GEL")
+
+    def generate_revenue_report(self):
+        print("\n\n=== 4.3. შემოსავლებისა და ფასდაკლებების რეპორტი ===")
+        self.print_revenue_report(self.build_revenue_report())
+        input("\nდააჭირეთ Enter-ს მენიუში დასაბრუნებლად...")
+
+    def generate_as_of_report(self):
+        from timeline_index import parse_as_of
+        print("\n\n=== 4.4. მდგომარეობა მოცემული თარიღისთვის ===")
+        while True:
+            text = input("თარიღი (YYYY-MM-DD ან YYYY-MM-DD HH:MM:SS): ").strip()
+            try:
+                as_of = parse_as_of(text)
+                break
+            except ValueError:
+                print("❌ შეცდომა: არასწორი ფორმატი.")
+
+        timeline = self.db.get_timeline_index()
+        occupancy = timeline.occupancy_as_of(as_of)
+        print(f"\n{'ID':<4} | {'დასახელება':<30} | {'დრო':<25} | {'შევსება'}")
+        print("-" * 85)
+        for course in self.courses:
+            print(f"{course['id']:<4} | {course['name']:<30} | {course['time_display']:<25} | {occupancy.get(course['id'], 0)}/{course['capacity']}")
+
+        course_id = input("\nჯგუფის სიისთვის აკრიფეთ კურსის ID (ან Enter მენიუში დასაბრუნებლად): ").strip()
+        if course_id:
+            roster = timeline.roster_as_of(as_of, course_id)
+            if not roster:
+                print("   ❌ ამ თარიღისთვის ჯგუფში არავინ იყო რეგისტრირებული.")
+            for i, row in enumerate(roster, 1):
+                print(f"   {i:<4} | {row.name + ' ' + row.surname:<30} | {row.father_name:<15} | {row.phone:<10} | {row.timestamp}")
+            input("\nდააჭირეთ Enter-ს მენიუში დასაბრუნებლად...")
+
+    def build_capacity_report(self, bucket="day", course_ids=None):
+        return self.db.get_capacity_stats(self.courses).report(bucket, course_ids)
+
+    def print_capacity_report(self, report):
+        def percent(value):
+            return f"{value * 100:.0f}%"
+
+        def time_to_full(hours):
+            return "-" if hours is None else f"{hours:.1f} სთ"
+
+        print("\n📚 ჯგუფების მიხედვით:")
+        print(f"{'ID':<4} | {'დასახელება':<30} | {'შევსება':<8} | {'%':<5} | {'რეგ.':<5} | {'გაუქ.':<5} | {'churn':<6} | {'უარი':<5} | {'შევსების დრო'}")
+        print("-" * 105)
+        for c in report["sections"]:
+            print(f"{c['id']:<4} | {c['name']:<30} | {c['occupied']}/{c['capacity']:<6} | {percent(c['fill_rate']):<5} | "
+                  f"{c['registrations']:<5} | {c['cancellations']:<5} | {percent(c['churn']):<6} | {c['turned_away']:<5} | {time_to_full(c['time_to_full_hours'])}")
+
+        period = "კვირის" if report["bucket"] == "week" else "დღის"
+        for subject, s in report["subjects"].items():
+            print("\n" + "=" * 70)
+            print(f"📘 {subject} | შევსება: {s['occupied']}/{s['capacity']} ({percent(s['fill_rate'])}) | churn: {percent(s['churn'])} | უარი: {s['turned_away']}")
+            print("=" * 70)
+            if not s["buckets"]:
+                print("   ❌ მოვლენები არ არის.")
+                continue
+            print(f"   {period + ' ბაკეტი':<14} | {'რეგ.':<5} | {'გაუქ.':<5} | {'უარი':<5}")
+            print("   " + "-" * 40)
+            for label, b in s["buckets"].items():
+                print(f"   {label:<14} | {b['registrations']:<5} | {b['cancellations']:<5} | {b['turned_away']:<5}")
+
+    def generate_capacity_report(self):
+        print("\n\n=== 4.5. ჯგუფების შევსების ანალიტიკა ===")
+        bucket = input("ბაკეტი: 1 - დღე, 2 - კვირა (Enter = დღე): ").strip()
+        self.print_capacity_report(self.build_capacity_report("week" if bucket == "2" else "day"))
+        input("\nდააჭირეთ Enter-ს მენიუში დასაბრუნებლად...")
+
     # ============================
     # ადმინისტრაციული მენიუ
     # ============================
@@ -728,7 +1358,10 @@ class RegistrationSystem:
             print("=== 4. ადმინისტრაციული რეპორტები ===")
             print("1. კურსის შევსების რეპორტი")
             print("2. აქტიური სტუდენტების სია")
-            print("3. უკან (მთავარ მენიუში)")
+            print("3. შემოსავლებისა და ფასდაკლებების რეპორტი")
+            print("4. მდგომარეობა მოცემული თარიღისთვის")
+            print("5. ჯგუფების შევსების ანალიტიკა")
+            print("6. უკან (მთავარ მენიუში)")
             
             cmd = input(">> აირჩიეთ მოქმედება: ").strip()
             
@@ -737,6 +1370,12 @@ class RegistrationSystem:
             elif cmd == "2":
                 self.generate_active_students_report()
             elif cmd == "3":
+                self.generate_revenue_report()
+            elif cmd == "4":
+                self.generate_as_of_report()
+            elif cmd == "5":
+                self.generate_capacity_report()
+            elif cmd == "6":
                 break
             else:
                 print("არასწორი ბრძანება.")
@@ -744,11 +1383,418 @@ class RegistrationSystem:
 
 
 # =========================================================
-# 5. მთავარი მენიუ 
+# 5. ბრძანების ხაზის (CLI) ქვებრძანებები
+# =========================================================
+# argparse და json მხოლოდ აქ შემოგვაქვს, რომ ინტერაქტიული მენიუს და
+# თითოეული ქვებრძანების გაშვება ზედმეტ იმპორტებზე დროს არ ხარჯავდეს.
+
+def _emit(data, fmt, table_printer):
+    if fmt == "json":
+        import json
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    else:
+        table_printer(data)
+
+
+def _row_summary(row):
+    return {
+        "course_id": row["course_id"],
+        "course_name": row["course_name"],
+        "time_keys": row["time_keys"].split(";"),
+        "receipt_id": row["receipt_id"],
+        "timestamp": row["timestamp"],
+    }
+
+
+def cmd_occupancy(system, args):
+    if args.as_of is not None:
+        occupancy = system.db.get_timeline_index().occupancy_as_of(args.as_of)
+    else:
+        occupancy = system.db.get_all_occupancies()
+    data = []
+    for course in system.courses:
+        if args.course and course["id"] not in args.course:
+            continue
+        occupied = occupancy.get(course["id"], 0)
+        data.append({
+            "id": course["id"], "name": course["name"], "time_display": course["time_display"],
+            "occupied": occupied, "capacity": course["capacity"],
+            "available": course["capacity"] - occupied,
+        })
+
+    def table(rows):
+        print(f"{'ID':<4} | {'დასახელება':<30} | {'დრო':<25} | {'სტატუსი'}")
+        print("-" * 85)
+        for c in rows:
+            status_icon = "✅" if c["available"] > 0 else "⛔ ჯგუფი შევსებულია"
+            print(f"{c['id']:<4} | {c['name']:<30} | {c['time_display']:<25} | {c['available']}/{c['capacity']} {status_icon}")
+
+    _emit(data, args.format, table)
+    return 0
+
+
+def cmd_students(system, args):
+    students = system.db.get_active_students()
+    data = [{
+        "name": name, "surname": surname, "father_name": father_name,
+        "phone": info["phone"], "email": info["email"],
+        "courses": [_row_summary(row) for row in info["active_courses"]],
+    } for (name, surname, father_name), info in sorted(students.items())]
+
+    def table(rows):
+        print(f"{'სახელი გვარი':<25} | {'მამის სახ.':<10} | {'მობილური':<9} | {'კურსის დასახელება':<30} | {'გადახდ.N':<10}")
+        print("-" * 100)
+        for s in rows:
+            full_name = f"{s['name']} {s['surname']}"
+            for i, c in enumerate(s["courses"]):
+                if i == 0:
+                    print(f"{full_name:<25} | {s['father_name']:<10} | {s['phone']:<9} | {c['course_name']:<30} | {c['receipt_id']:<10}")
+                else:
+                    print(f"{'':<25} | {'':<10} | {'':<9} | {c['course_name']:<30} | {c['receipt_id']:<10}")
+
+    _emit(data, args.format, table)
+    return 0
+
+
+def cmd_history(system, args):
+    if args.as_of is not None:
+        history = system.db.get_timeline_index().student_courses_as_of(args.as_of, args.name, args.surname, args.father_name)
+    else:
+        history = system.db.get_student_history(args.name, args.surname, args.father_name)
+    data = [_row_summary(row) for row in history]
+
+    def table(rows):
+        if not rows:
+            print(f"❌ სტუდენტი {args.name} {args.surname} {args.father_name} არ არის რეგისტრირებული აქტიურ კურსებზე.")
+            return
+        print(f"{'ID':<4} | {'დასახელება':<30} | {'დრო/ჯგუფი':<35} | {'გადახდ.N':<10}")
+        print("-" * 90)
+        for c in rows:
+            print(f"{c['course_id']:<4} | {c['course_name']:<30} | {', '.join(c['time_keys']):<35} | {c['receipt_id']:<10}")
+
+    _emit(data, args.format, table)
+    return 0
+
+
+def cmd_roster(system, args):
+    if args.as_of is not None:
+        roster = system.db.get_timeline_index().roster_as_of(args.as_of, args.course)
+    else:
+        roster = system.db.get_live_state().roster(args.course)
+    data = [{
+        "name": row.name, "surname": row.surname, "father_name": row.father_name,
+        "phone": row.phone, "email": row.email, "receipt_id": row.receipt_id, "timestamp": row.timestamp,
+    } for row in roster]
+
+    def table(rows):
+        if not rows:
+            print("   ❌ ამ ჯგუფში არავინ იყო რეგისტრირებული.")
+            return
+        print(f"{'№':<4} | {'სახელი გვარი':<30} | {'მამის სახელი':<15} | {'მობილური':<10} | {'რეგისტრაცია'}")
+        print("-" * 90)
+        for i, r in enumerate(rows, 1):
+            print(f"{i:<4} | {r['name'] + ' ' + r['surname']:<30} | {r['father_name']:<15} | {r['phone']:<10} | {r['timestamp']}")
+
+    _emit(data, args.format, table)
+    return 0
+
+
+def _register_payload_errors(payload):
+    """register --from-json-ის სტრუქტურის შემოწმება (ველების მნიშვნელობებს register_courses ამოწმებს)."""
+    if not isinstance(payload, dict):
+        return ["JSON უნდა იყოს ობიექტი ({...})."]
+    course_ids = payload.get("course_ids", [])
+    if not isinstance(course_ids, list) or not all(isinstance(cid, (str, int)) and not isinstance(cid, bool) for cid in course_ids):
+        return ["'course_ids' უნდა იყოს ID-ების სია, მაგ. [\"1\", \"5\"]."]
+    return []
+
+
+def cmd_register(system, args):
+    import json
+    try:
+        if args.from_json == "-":
+            payload = json.load(sys.stdin)
+        else:
+            with open(args.from_json, mode='r', encoding='utf-8') as f:
+                payload = json.load(f)
+    except ValueError as e:
+        payload, errors = None, [f"არავალიდური JSON: {e}"]
+    else:
+        errors = _register_payload_errors(payload)
+
+    if errors:
+        # შემავალი მონაცემების შეცდომა - რეესტრს არ ვეხებით
+        exit_code, summary = 2, None
+    else:
+        errors, summary = system.register_courses(payload, payload.get("course_ids", []), payload.get("receipt_id"))
+        exit_code = 1 if errors else 0
+    data = {"ok": not errors, "errors": errors, "summary": summary}
+
+    def table(result):
+        if result["errors"]:
+            for err in result["errors"]:
+                print(f"❌ {err}")
+            return
+        s = result["summary"]
+        print(f"🎉 რეგისტრაცია წარმატებით დასრულდა! კურსები: {', '.join(s['course_ids'])}")
+        print(f"კუთვნილი ფასდაკლება: {s['discount_percent']}%")
+        print(f"სულ გადასახდელი: {s['total']:.2f} GEL")
+
+    _emit(data, args.format, table)
+    return exit_code
+
+
+def cmd_cancel(system, args):
+    errors, cancelled = system.cancel_courses(args.name, args.surname, args.father_name, args.course)
+    data = {"ok": not errors, "errors": errors, "cancelled": cancelled}
+
+    def table(result):
+        for err in result["errors"]:
+            print(f"❌ {err}")
+        if result["cancelled"]:
+            print(f"🗑️ გაუქმდა კურსები: {', '.join(result['cancelled'])}")
+
+    _emit(data, args.format, table)
+    return 1 if errors else 0
+
+
+def cmd_check_receipt(system, args):
+    used = system.db.check_receipt_exists(args.receipt_id)
+    data = {"receipt_id": args.receipt_id, "used": used}
+
+    def table(result):
+        if result["used"]:
+            print("❌ დოკუმენტის ეს ნომერი უკვე გამოყენებულია სისტემაში!")
+        else:
+            print("✅ დოკუმენტის ნომერი თავისუფალია.")
+
+    _emit(data, args.format, table)
+    return 1 if used else 0
+
+
+def cmd_search(system, args):
+    results = system.db.get_name_index().search(
+        args.name, args.surname, args.father_name, max_distance=args.max_distance, limit=args.limit
+    )
+    data = [{
+        "name": name, "surname": surname, "father_name": father_name, "distance": distance
+    } for (name, surname, father_name), distance in results]
+
+    def table(rows):
+        if not rows:
+            print("❌ მსგავსი სტუდენტი ვერ მოიძებნა.")
+            return
+        print(f"{'№':<4} | {'სახელი გვარი':<30} | {'მამის სახელი':<15} | {'მანძილი'}")
+        print("-" * 65)
+        for i, r in enumerate(rows, 1):
+            print(f"{i:<4} | {r['name'] + ' ' + r['surname']:<30} | {r['father_name']:<15} | {r['distance']}")
+
+    _emit(data, args.format, table)
+    return 0
+
+
+def cmd_revenue(system, args):
+    report = system.build_revenue_report()
+    if args.format == "json":
+        report["tiers"] = {str(percent): t for percent, t in report["tiers"].items()}
+    _emit(report, args.format, system.print_revenue_report)
+    return 0
+
+
+def cmd_fsck(system, args):
+    from integrity import IntegrityChecker
+    if args.repair and os.path.exists(args.repair) and os.path.samefile(args.repair, system.db.filename):
+        print("❌ გასწორებული ასლი რეესტრის ფაილს არ უნდა გადააწეროს.", file=sys.stderr)
+        return 2
+    checker = IntegrityChecker(system.courses, workers=args.workers)
+    violations = checker.check(system.db.filename, args.repair)
+
+    if args.format == "json":
+        violations = list(violations)
+        data = {"rows": checker.rows, "counts": checker.counts, "repaired": checker.repaired, "violations": violations}
+        _emit(data, args.format, None)
+    else:
+        # დარღვევები იბეჭდება პოვნისთანავე - დიდ ფაილზე სია მეხსიერებაში არ გროვდება
+        for v in violations:
+            print(f"ხაზი {v['line']:<8} | {v['kind']:<15} | {v['message']}")
+        print("-" * 60)
+        print(f"შემოწმდა {checker.rows} ჩანაწერი.")
+        for kind, count in checker.counts.items():
+            if count:
+                print(f"  {kind}: {count}")
+        if not any(checker.counts.values()):
+            print("✅ დარღვევები არ მოიძებნა.")
+        if checker.repaired:
+            print(f"გასწორებული ასლი: {checker.repaired}")
+        elif args.repair:
+            print("გასწორებული ასლი არ ჩაწერილა: რეესტრის სათაური დაზიანებულია.")
+    return 1 if any(checker.counts.values()) else 0
+
+
+def cmd_changes(system, args):
+    import json
+    from change_feed import ChangeFeed, StaleCursorError, event_dict
+    feed = ChangeFeed(system.db.filename)
+
+    def table_line(event):
+        return (f"{event['timestamp']:<19} | {event['status']:<9} | {event['name'] + ' ' + event['surname']:<25} | "
+                f"{event['course_id']:<4} | {event['receipt_id']:<10} | {event['cursor']['offset']}:{event['cursor']['rows']}")
+
+    try:
+        if args.consumer and not args.from_start:
+            cursor = feed.load_cursor(args.consumer)
+        else:
+            cursor = feed.initial_cursor()
+        if args.follow:
+            # --follow: ერთი ხაზი თითო მოვლენაზე (JSON Lines), კურსორი ინახება ყოველი მოვლენის შემდეგ
+            for record, cursor in feed.follow(cursor, args.poll_interval):
+                event = event_dict(record, cursor)
+                print(json.dumps(event, ensure_ascii=False) if args.format == "json" else table_line(event), flush=True)
+                if args.consumer:
+                    feed.save_cursor(args.consumer, cursor)
+
+        events = [event_dict(record, position) for record, position in feed.changes(cursor)]
+    except KeyboardInterrupt:
+        return 0
+    except StaleCursorError as e:
+        print(f"❌ {e}. გამოიყენეთ --from-start.", file=sys.stderr)
+        return 2
+
+    def table(rows):
+        if not rows:
+            print("ახალი ცვლილებები არ არის.")
+        for event in rows:
+            print(table_line(event))
+
+    _emit(events, args.format, table)
+    if args.consumer and feed.cursor != cursor:
+        feed.save_cursor(args.consumer, feed.cursor)
+    return 0
+
+
+def cmd_capacity(system, args):
+    report = system.build_capacity_report(args.bucket, args.course)
+    _emit(report, args.format, system.print_capacity_report)
+    return 0
+
+
+def build_arg_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="სასწავლო ცენტრის მართვის სისტემა. ქვებრძანების გარეშე იხსნება ინტერაქტიული მენიუ."
+    )
+    parser.add_argument("--db", default=DB_FILE, help="რეესტრის CSV ფაილი")
+    parser.add_argument("--branches", metavar="FILE", help="ფილიალების კონფიგურაცია (JSON); --db-ის ნაცვლად")
+    parser.add_argument("--branch", help="ფილიალის სახელი --branches ფაილიდან")
+    parser.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="ჩატვირთული ფილიალების მეხსიერების სავარაუდო ლიმიტი (ნაგულისხმევი: branches.DEFAULT_MEMORY_BUDGET)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    def add_command(name, handler, help_text):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--format", choices=("table", "json"), default="table")
+        sub.set_defaults(handler=handler)
+        return sub
+
+    def as_of(text):
+        from timeline_index import parse_as_of
+        try:
+            return parse_as_of(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError("ფორმატი: YYYY-MM-DD ან 'YYYY-MM-DD HH:MM:SS'") from None
+
+    def add_as_of_arg(sub):
+        sub.add_argument("--as-of", type=as_of, metavar="DATETIME",
+                         help="მდგომარეობა მოცემული მომენტისთვის (თარიღი = დღის ბოლო)")
+
+    def add_student_args(sub):
+        sub.add_argument("--name", required=True)
+        sub.add_argument("--surname", required=True)
+        sub.add_argument("--father-name", required=True)
+
+    sub = add_command("occupancy", cmd_occupancy, "კურსების შევსება")
+    sub.add_argument("--course", action="append", help="მხოლოდ მითითებული ID (შეიძლება რამდენჯერმე)")
+    add_as_of_arg(sub)
+
+    add_command("students", cmd_students, "აქტიური სტუდენტების სია")
+
+    sub = add_command("history", cmd_history, "სტუდენტის აქტიური კურსები")
+    add_student_args(sub)
+    add_as_of_arg(sub)
+
+    sub = add_command("roster", cmd_roster, "ჯგუფის სია")
+    sub.add_argument("--course", required=True, help="კურსის ID")
+    add_as_of_arg(sub)
+
+    sub = add_command("search", cmd_search, "სტუდენტის ძებნა პრეფიქსით / მცირე შეცდომით")
+    sub.add_argument("--name", default="")
+    sub.add_argument("--surname", default="")
+    sub.add_argument("--father-name", default="")
+    sub.add_argument("--max-distance", type=int, default=1)
+    sub.add_argument("--limit", type=int, default=10)
+
+    add_command("revenue", cmd_revenue, "შემოსავლებისა და ფასდაკლებების რეპორტი")
+
+    sub = add_command("capacity", cmd_capacity, "ჯგუფების შევსება, churn და უარები დროის ბაკეტებით")
+    sub.add_argument("--bucket", choices=("day", "week"), default="day")
+    sub.add_argument("--course", action="append", help="მხოლოდ მითითებული ID (შეიძლება რამდენჯერმე)")
+
+    sub = add_command("register", cmd_register, "რეგისტრაცია JSON ფაილიდან")
+    sub.add_argument(
+        "--from-json", required=True, metavar="FILE",
+        help="JSON ობიექტი: name, surname, father_name, phone, email, course_ids, receipt_id ('-' = stdin)"
+    )
+
+    sub = add_command("cancel", cmd_cancel, "აქტიური კურსის გაუქმება")
+    add_student_args(sub)
+    sub.add_argument("--course", action="append", required=True, help="გასაუქმებელი კურსის ID")
+
+    sub = add_command("fsck", cmd_fsck, "რეესტრის მთლიანობის შემოწმება (exit code 1 = მოიძებნა დარღვევები)")
+    sub.add_argument("--repair", metavar="FILE", help="გასწორებული ასლის ჩაწერა (დაზიანებული ხაზების და ობოლი გაუქმებების გარეშე)")
+    sub.add_argument("--workers", type=int, metavar="N", help="ფაილის ნაწილების პარალელური შემოწმების პროცესები (ნაგულისხმევი: CPU-ების რაოდენობა)")
+
+    sub = add_command("changes", cmd_changes, "ახალი Active/Cancelled ჩანაწერები კურსორის შემდეგ")
+    sub.add_argument("--consumer", help="მომხმარებლის სახელი: კურსორი იკითხება და ინახება მის სახელზე")
+    sub.add_argument("--from-start", action="store_true", help="შენახული კურსორის იგნორირება")
+    sub.add_argument("--follow", action="store_true", help="ფაილის თვალყურის დევნება ახალი ხაზებისთვის")
+    sub.add_argument("--poll-interval", type=float, default=1.0, metavar="SECONDS")
+
+    sub = add_command("check-receipt", cmd_check_receipt, "ქვითრის შემოწმება (exit code 1 = უკვე გამოყენებულია)")
+    sub.add_argument("receipt_id")
+
+    return parser
+
+
+def run_command(argv):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if args.branches:
+        from branches import BranchHost, load_branches
+        host = BranchHost(load_branches(args.branches), RegistrationSystem)
+        if args.memory_budget is not None:
+            host.memory_budget = args.memory_budget * 1024 * 1024
+        if args.branch is None:
+            if args.command is not None:
+                parser.error("--branches-თან ერთად ქვებრძანებას სჭირდება --branch")
+            branch_menu(host)
+            return 0
+        if args.branch not in host:
+            parser.error(f"უცნობი ფილიალი: {args.branch}")
+        system = host.get(args.branch)
+    else:
+        system = RegistrationSystem(args.db)
+
+    if args.command is None:
+        interactive_menu(system)
+        return 0
+    return args.handler(system, args)
+
+
+# =========================================================
+# 6. მთავარი მენიუ 
 # =========================================================
-def main():
-    system = RegistrationSystem()
-    
+def interactive_menu(system):
     while True:
         print("\n" * 3)
         print("=== სასწავლო ცენტრის მართვის სისტემა ===")
@@ -772,5 +1818,35 @@ def main():
         else:
             print("არასწორი ბრძანება.")
 
+
+def branch_menu(host):
+    """ფილიალის არჩევა; ფილიალის მენიუდან გასვლა აქ აბრუნებს."""
+    names = sorted(host.branches)
+    while True:
+        print("\n" * 3)
+        print("=== ფილიალები ===")
+        loaded = set(host.loaded())
+        for i, name in enumerate(names, 1):
+            print(f"{i}. {name}{' [ჩატვირთულია]' if name in loaded else ''}")
+        print("X. გასვლა")
+
+        cmd = input(">> აირჩიეთ ფილიალი: ").strip().lower()
+        if cmd == "x":
+            print("ნახვამდის!")
+            break
+        if cmd.isdigit() and 1 <= int(cmd) <= len(names):
+            interactive_menu(host.get(names[int(cmd) - 1]))
+        else:
+            print("არასწორი ბრძანება.")
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv:
+        interactive_menu(RegistrationSystem())
+        return 0
+    return run_command(argv)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,150 @@
+# records.py
+
+# რეესტრის ჩანაწერის კომპაქტური წარმოდგენა მეხსიერებაში.
+# dict-ის ნაცვლად __slots__ ობიექტი, განმეორებადი სტრიქონები (კურსი, სტატუსი, დრო, სახელები)
+# ერთ ასლად ინახება, ხოლო timestamp - მთელ რიცხვად (YYYYMMDDHHMMSS).
+
+import sys
+
+FIELDS = (
+    "name", "surname", "father_name", "phone", "email",
+    "course_id", "course_name", "time_keys", "status", "receipt_id", "timestamp"
+)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# ფაილის ნაწილ-ნაწილ (mmap) დამუშავებისას ერთი ნაწილის ზომა
+SCAN_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def encode_timestamp(text):
+    """'2025-09-01 10:30:00' -> 20250901103000. არასწორ ფორმატზე აბრუნებს 0-ს."""
+    digits = text.replace("-", "").replace(" ", "").replace(":", "")
+    if len(digits) != 14 or not digits.isdigit():
+        return 0
+    return int(digits)
+
+
+def decode_timestamp(value):
+    if not value:
+        return ""
+    s = str(value)
+    return f"{s[0:4]}-{s[4:6]}-{s[6:8]} {s[8:10]}:{s[10:12]}:{s[12:14]}"
+
+
+def line_chunks(mm, start, end, chunk_size=SCAN_CHUNK_SIZE, whole_records=False):
+    """[start, end) დიაპაზონს ყოფს ~chunk_size ზომის (start, stop) ნაწილებად, რომლებიც '\n'-ზე მთავრდება.
+
+    whole_records=True - ნაწილი მთავრდება მხოლოდ იქ, სადაც მასში ბრჭყალების რაოდენობა ლუწია,
+    ანუ ბრჭყალებიანი (მრავალხაზიანი) ველის გარეთ; თითო ნაწილი მაშინ მთელ ჩანაწერებს შეიცავს.
+    """
+    pos = start
+    while pos < end:
+        stop = min(pos + chunk_size, end)
+        if stop < end:
+            # ძალიან გრძელ ხაზზე - შემდეგ '\n'-მდე
+            line_end = mm.rfind(b"\n", pos, stop)
+            if line_end == -1:
+                line_end = mm.find(b"\n", stop, end)
+            stop = end if line_end == -1 else line_end + 1
+        if whole_records:
+            quotes = mm[pos:stop].count(b'"')
+            while quotes % 2 and stop < end:
+                line_end = mm.find(b"\n", stop, end)
+                next_stop = end if line_end == -1 else line_end + 1
+                quotes += mm[stop:next_stop].count(b'"')
+                stop = next_stop
+        yield pos, stop
+        pos = stop
+
+
+class Record:
+    """რეესტრის ერთი ხაზი. row["field"] წვდომა ინარჩუნებს csv.DictReader-ის ინტერფეისს."""
+
+    __slots__ = (
+        "name", "surname", "father_name", "phone", "email",
+        "course_id", "course_name", "time_keys", "status", "receipt_id", "ts"
+    )
+
+    def __init__(self, name, surname, father_name, phone, email,
+                 course_id, course_name, time_keys, status, receipt_id, ts):
+        self.name = name
+        self.surname = surname
+        self.father_name = father_name
+        self.phone = phone
+        self.email = email
+        self.course_id = course_id
+        self.course_name = course_name
+        self.time_keys = time_keys
+        self.status = status
+        self.receipt_id = receipt_id
+        self.ts = ts
+
+    @property
+    def timestamp(self):
+        return decode_timestamp(self.ts)
+
+    @property
+    def student_key(self):
+        return (self.name, self.surname, self.father_name)
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def get(self, field, default=None):
+        return getattr(self, field, default)
+
+    def keys(self):
+        return FIELDS
+
+    def to_dict(self):
+        return {field: self[field] for field in FIELDS}
+
+    def __repr__(self):
+        return f"Record({self.to_dict()!r})"
+
+
+class RecordReader:
+    """csv.reader-ის ხაზებს გარდაქმნის Record-ებად; ერთი წამკითხველის ფარგლებში
+    ერთნაირი სტრიქონები ერთ ობიექტს იზიარებენ.
+
+    header - ფაილის სათაური; სვეტების რიგი შეიძლება FIELDS-ისგან განსხვავდებოდეს.
+    """
+
+    def __init__(self, header=FIELDS):
+        positions = [list(header).index(field) for field in FIELDS]
+        self._reorder = None if positions == list(range(len(FIELDS))) else positions
+        self._width = len(header)
+        self._strings = {}
+
+    def from_row(self, row):
+        """აბრუნებს Record-ს ან None-ს, თუ ხაზი დაზიანებულია (არასწორი სვეტების რაოდენობა)."""
+        return next(self.from_rows((row,)), None)
+
+    def from_rows(self, rows):
+        """იგივე, რაც from_row, მთელ ნაკადზე; დაზიანებული ხაზები გამოიტოვება."""
+        share = self._strings.setdefault
+        intern = sys.intern
+        reorder = self._reorder
+        width = self._width
+        # ერთი გადახდის ხაზები ზედიზედ იწერება, ამიტომ ტელეფონს, ელ-ფოსტას და ქვითარს
+        # წინა ხაზთან შედარებით ვაზიარებთ - ჰეშირება და ლექსიკონის ზრდა აღარ სჭირდება
+        prev_phone = prev_email = prev_receipt = None
+        for row in rows:
+            if len(row) != width:
+                continue
+            if reorder is not None:
+                row = [row[i] for i in reorder]
+            (name, surname, father_name, phone, email,
+             course_id, course_name, time_keys, status, receipt_id, timestamp) = row
+            if phone == prev_phone: phone = prev_phone
+            if email == prev_email: email = prev_email
+            if receipt_id == prev_receipt: receipt_id = prev_receipt
+            prev_phone, prev_email, prev_receipt = phone, email, receipt_id
+            yield Record(
+                share(name, name), share(surname, surname), share(father_name, father_name), phone, email,
+                intern(course_id), intern(course_name), intern(time_keys), intern(status),
+                receipt_id, encode_timestamp(timestamp),
+            )
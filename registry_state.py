@@ -0,0 +1,89 @@
+# registry_state.py
+
+# რეესტრის მიმდინარე მდგომარეობა მეხსიერებაში: დაკავებულობა, სტუდენტების აქტიური
+# კურსები, საკონტაქტო მონაცემები და გამოყენებული ქვითრები. add_records() ცვლის
+# მდგომარეობას მხოლოდ ახალი ჩანაწერებით, ამიტომ ფაილის ბოლოში დამატებული ხაზების
+# ასახვა ცვლილებების პროპორციულად ღირს.
+
+from collections import defaultdict
+
+
+class RegistryState:
+    """წესები ემთხვევა StudentDatabase-ის სრული სკანირების მეთოდებს."""
+
+    def __init__(self):
+        self._latest_status = {}  # (student_key, course_id) -> ბოლო სტატუსი
+        self._occupancy = defaultdict(int)  # course_id -> აქტიური სტუდენტები
+        self._active = {}  # student_key -> { course_id: Active Record }
+        self._contacts = {}  # student_key -> (phone, email)
+        self._receipts = set()  # Active ჩანაწერებში გამოყენებული ქვითრები
+
+    @classmethod
+    def from_records(cls, records):
+        state = cls()
+        state.add_records(records)
+        return state
+
+    def add_records(self, records):
+        latest_status = self._latest_status
+        occupancy = self._occupancy
+        active = self._active
+        for row in records:
+            key = row.student_key
+            course_id = row.course_id
+            status = row.status
+
+            previous = latest_status.get((key, course_id))
+            latest_status[(key, course_id)] = status
+            if status == "Active" and previous != "Active":
+                occupancy[course_id] += 1
+            elif previous == "Active" and status != "Active":
+                occupancy[course_id] -= 1
+
+            self._contacts[key] = (row.phone, row.email)
+            if status == "Active":
+                active.setdefault(key, {})[course_id] = row
+                self._receipts.add(row.receipt_id)
+            elif status == "Cancelled":
+                courses = active.get(key)
+                if courses is not None:
+                    courses.pop(course_id, None)
+
+    def footprint(self):
+        """შენახული ობიექტების რაოდენობა მეხსიერების შესაფასებლად (იხ. branches.ENTRY_BYTES)."""
+        return {
+            # აქტიური Record-ები = დაკავებული ადგილები (დაკავებულობის ჯამი კურსების რაოდენობის პროპორციულად ითვლება)
+            "record": sum(self._occupancy.values()),
+            "state_entry": len(self._latest_status),
+            "student": len(self._contacts),
+            "receipt": len(self._receipts),
+        }
+
+    def course_occupancy(self, course_id):
+        return self._occupancy.get(course_id, 0)
+
+    def all_occupancies(self):
+        return {course_id: count for course_id, count in self._occupancy.items() if count}
+
+    def student_history(self, student_key):
+        return list(self._active.get(student_key, {}).values())
+
+    def receipt_exists(self, receipt_id):
+        return receipt_id in self._receipts
+
+    def roster(self, course_id):
+        """ჯგუფის აქტიური ჩანაწერები, სტუდენტის მიხედვით დალაგებული."""
+        return sorted(
+            (courses[course_id] for courses in self._active.values() if course_id in courses),
+            key=lambda row: row.student_key,
+        )
+
+    def student_keys(self):
+        """ყველა სტუდენტი, ვინც რეესტრში ოდესმე გამოჩენილა (გაუქმებულების ჩათვლით)."""
+        return self._contacts.keys()
+
+    def active_students(self):
+        return {
+            key: {"phone": self._contacts[key][0], "email": self._contacts[key][1], "active_courses": list(courses.values())}
+            for key, courses in self._active.items() if courses
+        }
@@ -0,0 +1,58 @@
+# screen.py
+
+# ინტერაქტიული ეკრანების რენდერი. მთელი კადრი ჯერ ბუფერში იგება და ტერმინალში
+# ერთი write-ით გადის (SSH-ზე თითო print ცალკე პაკეტად არ მიდის).
+# კურსების ცხრილის ხაზები ინახება და ხელახლა იფორმატება მხოლოდ მაშინ,
+# როცა ხაზის მდგომარეობა (თავისუფალი ადგილები, მონიშვნა) შეიცვალა.
+
+import sys
+
+COURSE_TABLE_HEADER = f"{'ID':<4} | {'დასახელება':<30} | {'დრო':<25} | {'სტატუსი'}"
+COURSE_TABLE_SEPARATOR = "-" * 85
+
+
+class Frame:
+    """ერთი ეკრანის ბუფერი: line() ამატებს ხაზს, flush() წერს ყველაფერს ერთად."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lines = []
+
+    def line(self, text=""):
+        self._lines.append(text)
+
+    def lines(self, texts):
+        self._lines.extend(texts)
+
+    def flush(self):
+        if self._lines:
+            self.stream.write("\n".join(self._lines) + "\n")
+            self._lines = []
+        self.stream.flush()
+
+
+class CourseTable:
+    """კურსების ცხრილი, რომელიც წინა კადრის ხაზებს იმეორებს, თუ მდგომარეობა არ შეცვლილა."""
+
+    def __init__(self, courses):
+        self.courses = courses
+        self._rows = {}  # course_id -> ((available, mark), ხაზი)
+
+    def row(self, course, occupied, mark=""):
+        state = (course["capacity"] - occupied, mark)
+        cached = self._rows.get(course["id"])
+        if cached is not None and cached[0] == state:
+            return cached[1]
+
+        available = state[0]
+        status_icon = "✅" if available > 0 else "⛔ ჯგუფი შევსებულია"
+        text = f"{course['id']:<4} | {course['name']:<30} | {course['time_display']:<25} | {available}/{course['capacity']} {status_icon}{mark}"
+        self._rows[course["id"]] = (state, text)
+        return text
+
+    def render(self, frame, occupancy, marks):
+        """occupancy - { course_id: დაკავებული }, marks - { course_id: მონიშვნის ტექსტი }."""
+        frame.line(COURSE_TABLE_HEADER)
+        frame.line(COURSE_TABLE_SEPARATOR)
+        for course in self.courses:
+            frame.line(self.row(course, occupancy.get(course["id"], 0), marks.get(course["id"], "")))
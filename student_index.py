@@ -0,0 +1,203 @@
+# student_index.py
+
+# სტუდენტების სწრაფი ძებნის ინდექსი (სახელი, გვარი, მამის სახელი).
+# თითოეული ველისთვის ინახება ნორმალიზებული სიტყვების დალაგებული სია, რომელზეც ძებნა
+# პრეფიქსული ხის (trie) მსგავსად მიდის. ძებნა აბრუნებს კანდიდატებს პრეფიქსით და მცირე
+# შეცდომებით (Levenshtein მანძილი).
+
+from bisect import bisect_left
+
+FIELDS = ("name", "surname", "father_name")
+
+
+def normalize(text):
+    """ნორმალიზაცია: ზედმეტი ჰარეები და მთავრული -> მხედრული (casefold)."""
+    return " ".join(str(text).split()).casefold()
+
+
+def prefix_distance(query, word):
+    """მინიმალური რედაქტირების მანძილი query-სა და word-ის ნებისმიერ პრეფიქსს შორის."""
+    prev_row = list(range(len(query) + 1))
+    best = prev_row[-1]
+    for char in word:
+        row = [prev_row[0] + 1]
+        for col in range(1, len(query) + 1):
+            row.append(min(
+                row[col - 1] + 1,
+                prev_row[col] + 1,
+                prev_row[col - 1] + (query[col - 1] != char),
+            ))
+        best = min(best, row[-1])
+        prev_row = row
+    return best
+
+
+class _WordIndex:
+    """ერთი ველის უნიკალური (ნორმალიზებული) სიტყვები დალაგებულ სიაში.
+
+    ძებნა დალაგებულ სიას პრეფიქსული ხესავით (trie) ატარებს: მეზობელ სიტყვებს საერთო
+    პრეფიქსის რიგები ეზიარებათ, ხოლო უიმედო პრეფიქსის მქონე სიტყვები ერთი bisect-ით
+    გამოიტოვება. ცალკე კვანძები არ იქმნება, ამიტომ აგება მხოლოდ დალაგებაა.
+    """
+
+    def __init__(self):
+        self._keys = {}  # word -> {key}
+        self._words = []
+        self._pending = []  # ახალი სიტყვები, რომლებიც ჯერ არ დალაგებულა
+
+    def add(self, word, key):
+        keys = self._keys.get(word)
+        if keys is None:
+            keys = self._keys[word] = set()
+            self._pending.append(word)
+        keys.add(key)
+
+    def _sorted_words(self):
+        if self._pending:
+            # timsort დალაგებულ სიას მოკლე ბოლოთი თითქმის წრფივად აერთიანებს
+            self._words.extend(self._pending)
+            self._words.sort()
+            self._pending = []
+        return self._words
+
+    def search(self, query, max_cost):
+        """აბრუნებს { key: მანძილი } ყველა სიტყვისთვის, რომლის პრეფიქსიც query-დან max_cost-ის ფარგლებშია."""
+        words = self._sorted_words()
+        results = {}
+        # rows[d] / bests[d] - რიგი და საუკეთესო მანძილი მიმდინარე სიტყვის პირველი d სიმბოლოსთვის
+        rows = [list(range(len(query) + 1))]
+        bests = [len(query)]
+        path = ""
+        i = 0
+        while i < len(words):
+            word = words[i]
+            common = 0
+            limit = min(len(path), len(word))
+            while common < limit and path[common] == word[common]:
+                common += 1
+            del rows[common + 1:]
+            del bests[common + 1:]
+
+            pruned = False
+            for char in word[common:]:
+                prev_row = rows[-1]
+                row = [prev_row[0] + 1]
+                for col in range(1, len(query) + 1):
+                    row.append(min(
+                        row[col - 1] + 1,
+                        prev_row[col] + 1,
+                        prev_row[col - 1] + (query[col - 1] != char),
+                    ))
+                # best - საუკეთესო მანძილი ამ გზაზე არსებულ ნებისმიერ პრეფიქსამდე
+                best = min(bests[-1], row[-1])
+                rows.append(row)
+                bests.append(best)
+                if best > max_cost and min(row) > max_cost:
+                    pruned = True
+                    break
+            path = word[:len(rows) - 1]
+
+            if pruned:
+                # ამ პრეფიქსით დაწყებული ვერცერთი სიტყვა ვეღარ დაემთხვევა
+                i = bisect_left(words, path + "\U0010ffff", i + 1)
+                continue
+            if bests[-1] <= max_cost:
+                for key in self._keys[word]:
+                    if results.get(key, max_cost + 1) > bests[-1]:
+                        results[key] = bests[-1]
+            i += 1
+        return results
+
+
+class StudentIndex:
+    """სახელის ინდექსი: key = (name, surname, father_name) ორიგინალი მნიშვნელობებით."""
+
+    # ამ რაოდენობამდე კანდიდატებს დანარჩენ ველებზე პირდაპირ ვამოწმებთ, ხის ძებნის ნაცვლად
+    DIRECT_CHECK_LIMIT = 2000
+
+    def __init__(self):
+        self._words = {field: _WordIndex() for field in FIELDS}
+        self._keys = set()
+
+    def __len__(self):
+        return len(self._keys)
+
+    @classmethod
+    def from_records(cls, records):
+        index = cls()
+        index.add_records(records)
+        return index
+
+    @classmethod
+    def from_keys(cls, keys):
+        """ინდექსი უკვე ცნობილი (name, surname, father_name) გასაღებებიდან - რეესტრის წაკითხვის გარეშე."""
+        index = cls()
+        for key in keys:
+            index.add(*key)
+        return index
+
+    def add_records(self, records):
+        for row in records:
+            self.add(row["name"], row["surname"], row["father_name"])
+
+    def add(self, name, surname, father_name):
+        key = (name, surname, father_name)
+        if key in self._keys:
+            return
+        self._keys.add(key)
+        for field, value in zip(FIELDS, key):
+            self._words[field].add(normalize(value), key)
+
+    def footprint(self):
+        """შენახული ობიექტების რაოდენობა მეხსიერების შესაფასებლად (იხ. branches.ENTRY_BYTES)."""
+        return {"index_key": len(self._keys), "index_word": sum(len(words._keys) for words in self._words.values())}
+
+    @staticmethod
+    def _allowed_distance(query, max_distance):
+        # მოკლე მოთხოვნაზე შეცდომის დაშვება თითქმის ყველაფერს დაამთხვევდა
+        return 0 if len(query) <= 2 else max_distance
+
+    def search(self, name="", surname="", father_name="", max_distance=1, limit=10):
+        """აბრუნებს [(key, ჯამური მანძილი), ...] საუკეთესოდან უარესისკენ.
+
+        ცარიელი ველი ძებნაში არ მონაწილეობს. სრული დამთხვევა უპირატესია პრეფიქსულზე.
+        """
+        queries = [
+            (field, normalize(value))
+            for field, value in zip(FIELDS, (name, surname, father_name))
+            if normalize(value)
+        ]
+        if not queries:
+            return []
+
+        # ჯერ ყველაზე გრძელი (სელექციური) მოთხოვნა
+        queries.sort(key=lambda q: len(q[1]), reverse=True)
+        field, query = queries[0]
+        candidates = self._words[field].search(query, self._allowed_distance(query, max_distance))
+
+        for field, query in queries[1:]:
+            if not candidates:
+                break
+            allowed = self._allowed_distance(query, max_distance)
+            position = FIELDS.index(field)
+            if len(candidates) <= self.DIRECT_CHECK_LIMIT:
+                narrowed = {}
+                for key, cost in candidates.items():
+                    distance = prefix_distance(query, normalize(key[position]))
+                    if distance <= allowed:
+                        narrowed[key] = cost + distance
+            else:
+                matches = self._words[field].search(query, allowed)
+                narrowed = {key: cost + matches[key] for key, cost in candidates.items() if key in matches}
+            candidates = narrowed
+
+        normalized_queries = dict(queries)
+
+        def exactness(key):
+            return sum(
+                normalize(value) != normalized_queries[field]
+                for field, value in zip(FIELDS, key) if field in normalized_queries
+            )
+
+        ranked = sorted(candidates.items(), key=lambda item: (item[1], exactness(item[0]), item[0]))
+        return ranked[:limit]
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# მოდულები რეპოზიტორიის ძირშია (main.py, change_feed.py, ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,109 @@
+# registry_replay.py
+
+# ტესტების დამხმარე: სატესტო რეესტრის გენერაცია და საყრდენი (reference) გადათამაშება
+# ჩვეულებრივი csv.DictReader-ით. სწრაფი გზების (mmap, ფაილის ბოლოს დევნება, ცვლილებების
+# ნაკადი) შედეგები ამ გადათამაშებას უნდა დაემთხვეს.
+
+import csv
+import io
+import random
+
+from records import FIELDS, encode_timestamp
+
+HEADER = list(FIELDS)
+COURSE_IDS = [str(i) for i in range(1, 8)]
+
+
+def make_rows(seed, count, multiline=False, start=0):
+    """დეტერმინისტული ხაზები: გაუქმებები, ერთი ქვითრის რამდენიმე კურსი და აცდენილი საათები.
+
+    multiline=True - ზოგ სახელში არის მძიმე, ბრჭყალი ან ხაზის გადატანა (ბრჭყალებიანი ველი).
+    """
+    rng = random.Random(seed)
+    names = [f"სახელი{i}" for i in range(12)]
+    if multiline:
+        names += ["ანა,მარია", 'ნიკა "ნიკო"', "ლუკა\nგიორგი", "ეკა\r\nთამარი"]
+    rows = []
+    for i in range(start, start + count):
+        name = rng.choice(names)
+        status = "Cancelled" if rng.random() < 0.3 else "Active"
+        # საათი ზოგჯერ უკან მიდის - სხვა მაგიდის აცდენილი საათი
+        minute = i * 7 + rng.choice((0, 0, 0, -30))
+        day, minute = divmod(max(minute, 0), 24 * 60)
+        timestamp = f"2025-09-{day + 1:02d} {minute // 60:02d}:{minute % 60:02d}:00"
+        rows.append([
+            name, "გვარი", "მამა", "555000000", "a@b.ge",
+            rng.choice(COURSE_IDS), "კურსი", "MON_10_12", status, f"R{i // 3}", timestamp,
+        ])
+    return rows
+
+
+def encode_rows(rows, newline="\n", header=True):
+    """ხაზები ბაიტებად, როგორც csv.writer ჩაწერდა (newline - ხაზის დასასრული)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator=newline)
+    if header:
+        writer.writerow(HEADER)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def complete_part(data):
+    """data-ს ნაწილი ბოლო '\\n'-ის ჩათვლით (ბოლო დაუსრულებელი ხაზის გარეშე)."""
+    return data[:data.rfind(b"\n") + 1]
+
+
+def replay(data):
+    """data (bytes) -> ჩანაწერები (dict) csv.DictReader-ით; სვეტების არასწორი რაოდენობის ხაზები გამოიტოვება."""
+    reader = csv.DictReader(io.StringIO(data.decode("utf-8"), newline=""))
+    return [row for row in reader if None not in row and None not in row.values()]
+
+
+def occupancy(rows):
+    latest = {}
+    for row in rows:
+        latest[(row["name"], row["surname"], row["father_name"], row["course_id"])] = row["status"]
+    result = {}
+    for (_, _, _, course_id), status in latest.items():
+        if status == "Active":
+            result[course_id] = result.get(course_id, 0) + 1
+    return result
+
+
+def history(rows, student_key):
+    """სტუდენტის აქტიური კურსები: { course_id: receipt_id }."""
+    active = {}
+    for row in rows:
+        if (row["name"], row["surname"], row["father_name"]) != student_key:
+            continue
+        if row["status"] == "Active":
+            active[row["course_id"]] = row["receipt_id"]
+        elif row["status"] == "Cancelled":
+            active.pop(row["course_id"], None)
+    return active
+
+
+def occupancy_as_of(rows, ts):
+    """დაკავებულობა ts მომენტისთვის: ხაზები დროის მიხედვით (სტაბილურად) დალაგებული."""
+    ordered = sorted(rows, key=lambda row: encode_timestamp(row["timestamp"]))
+    active = set()
+    for row in ordered:
+        if encode_timestamp(row["timestamp"]) > ts:
+            break
+        key = (row["name"], row["surname"], row["father_name"], row["course_id"])
+        if row["status"] == "Active":
+            active.add(key)
+        elif row["status"] == "Cancelled":
+            active.discard(key)
+    result = {}
+    for *_, course_id in active:
+        result[course_id] = result.get(course_id, 0) + 1
+    return result
+
+
+def students(rows):
+    return sorted({(row["name"], row["surname"], row["father_name"]) for row in rows})
+
+
+def record_history(records):
+    return {row.course_id: row.receipt_id for row in records}
@@ -0,0 +1,72 @@
+# ფილიალების LRU ქეში: მეხსიერების შეფასება წარმოდგენების სტრუქტურიდან და ლიმიტის
+# შემოწმება წარმოდგენის ჩატვირთვისთანავე.
+
+import gc
+import json
+import tracemalloc
+
+import pytest
+
+from analytics import CapacityStats
+from branches import BranchHost, load_branches
+from courses_data import university_prep_data
+from main import RegistrationSystem, StudentDatabase
+from registry_state import RegistryState
+from registry_replay import encode_rows, make_rows
+from student_index import StudentIndex
+from timeline_index import TimelineIndex
+
+BUILDERS = {
+    "live_state": RegistryState.from_records,
+    "name_index": StudentIndex.from_records,
+    "timeline": TimelineIndex.from_records,
+    "capacity": lambda records: CapacityStats.from_records(university_prep_data["subjects"], records),
+}
+
+
+def write_registry(path, count, students):
+    rows = make_rows(90, count)
+    for i, row in enumerate(rows):
+        student = i * 7919 % students
+        row[0:5] = [f"სახელი{student % 500}", f"გვარი{student}", "მამა", f"5{student:08d}", f"s{student}@mail.ge"]
+        row[5] = str(i % 21 + 1)
+    with open(path, mode='wb') as f:
+        f.write(encode_rows(rows))
+
+
+@pytest.mark.parametrize("students", [200, 20000])
+@pytest.mark.parametrize("view", list(BUILDERS))
+def test_estimate_follows_view_structure(tmp_path, view, students):
+    path = str(tmp_path / "registry.csv")
+    write_registry(path, 12000, students)
+    db = StudentDatabase(path)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        setattr(db, {"live_state": "_live_state", "name_index": "_name_index", "timeline": "_timeline_index",
+                     "capacity": "_capacity_stats"}[view], db._load_view(BUILDERS[view]))
+        used, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    system = RegistrationSystem.__new__(RegistrationSystem)
+    system.db = db
+    assert 0.6 < BranchHost._estimate(system) / used < 1.5, (BranchHost._estimate(system), used)
+
+
+def test_view_loaded_mid_session_triggers_eviction(tmp_path):
+    for name in ("a", "b"):
+        write_registry(str(tmp_path / f"{name}.csv"), 3000, 2000)
+    with open(tmp_path / "branches.json", mode='w', encoding='utf-8') as f:
+        json.dump({"a": {"db": "a.csv"}, "b": {"db": "b.csv"}}, f)
+    host = BranchHost(load_branches(str(tmp_path / "branches.json")), RegistrationSystem)
+
+    a = host.get("a")
+    a.db.get_live_state()
+    host.memory_budget = BranchHost._estimate(a) * 3 // 2
+    b = host.get("b")
+    assert host.loaded() == ["a", "b"]
+    # ფილიალის შეცვლის გარეშე: b-ს წარმოდგენის ჩატვირთვამ ლიმიტი გადააჭარბა და a გამოიდევნა
+    b.db.get_live_state()
+    assert host.loaded() == ["b"]
+    b.db.get_timeline_index()
+    assert host.loaded() == ["b"]
@@ -0,0 +1,154 @@
+# ჯგუფების შევსების სტატისტიკა (analytics.CapacityStats): churn, შევსების დრო, კვირის
+# ბაკეტები და შენახული მდგომარეობიდან გაგრძელება შემდეგ პროცესში.
+
+import os
+
+import pytest
+
+import analytics
+from analytics import CapacityStats
+from main import StudentDatabase
+from records import Record, encode_timestamp
+from registry_replay import COURSE_IDS, encode_rows, make_rows
+
+COURSES = [
+    {"id": "1", "name": "მათემატიკა (ჯგუფი 1)", "capacity": 2},
+    {"id": "2", "name": "მათემატიკა (ჯგუფი 2)", "capacity": 3},
+]
+REGISTRY_COURSES = [{"id": course_id, "name": f"საგანი{course_id} (ჯგუფი)", "capacity": 8} for course_id in COURSE_IDS]
+
+
+def record(name, course_id, status, timestamp):
+    return Record(name, "გვარი", "მამა", "555000000", "a@b.ge", course_id, "კურსი", "MON_10_12",
+                  status, "R1", encode_timestamp(timestamp))
+
+
+def section(report, course_id):
+    return next(s for s in report["sections"] if s["id"] == course_id)
+
+
+def test_churn_counts_transitions_only():
+    stats = CapacityStats.from_records(COURSES, [
+        record("ა", "2", "Active", "2025-01-06 10:00:00"),
+        record("ა", "2", "Active", "2025-01-06 11:00:00"),  # უკვე აქტიურია - ახალი რეგისტრაცია არ არის
+        record("ბ", "2", "Active", "2025-01-07 10:00:00"),
+        record("ბ", "2", "Cancelled", "2025-01-08 10:00:00"),
+        record("გ", "2", "Cancelled", "2025-01-08 11:00:00"),  # ობოლი გაუქმება
+        record("ბ", "2", "Active", "2025-01-09 10:00:00"),
+    ])
+    result = section(stats.report(), "2")
+    assert (result["registrations"], result["cancellations"], result["occupied"]) == (3, 1, 2)
+    assert result["churn"] == pytest.approx(1 / 3)
+    assert result["fill_rate"] == pytest.approx(2 / 3)
+
+
+def test_time_to_full_uses_earliest_timestamp():
+    stats = CapacityStats.from_records(COURSES, [
+        record("ა", "1", "Active", "2025-01-06 12:00:00"),
+        record("ა", "1", "Cancelled", "2025-01-06 12:30:00"),
+        # სხვა მაგიდის აცდენილი საათი: ფაილში მოგვიანებით, დროით უფრო ადრე
+        record("ბ", "1", "Active", "2025-01-06 10:00:00"),
+        record("გ", "1", "Active", "2025-01-06 13:30:00"),
+        record("გ", "1", "Cancelled", "2025-01-06 15:00:00"),
+        record("დ", "1", "Active", "2025-01-06 16:00:00"),
+    ])
+    result = section(stats.report(), "1")
+    # ჯგუფი პირველად 13:30-ზე შეივსო, პირველი რეგისტრაცია კი 10:00-ზეა
+    assert result["time_to_full_hours"] == pytest.approx(3.5)
+    assert section(stats.report(), "2")["time_to_full_hours"] is None
+
+
+def test_week_buckets_follow_iso_weeks():
+    stats = CapacityStats.from_records(COURSES, [
+        record("ა", "2", "Active", "2025-01-06 10:00:00"),  # ორშაბათი, W02
+        record("ბ", "2", "Active", "2025-01-12 23:59:59"),  # კვირა, W02
+        record("ბ", "2", "Cancelled", "2025-01-13 00:00:00"),  # ორშაბათი, W03
+        record("ა", "1", "Active", "2024-12-30 09:00:00"),  # 2025 წლის W01
+    ])
+    stats.add_rejections([("2", encode_timestamp("2025-01-13 09:00:00"))])
+    report = stats.report("week")
+    assert section(report, "2")["buckets"] == {
+        "2025-W02": {"registrations": 2, "cancellations": 0, "turned_away": 0},
+        "2025-W03": {"registrations": 0, "cancellations": 1, "turned_away": 1},
+    }
+    assert section(report, "1")["buckets"] == {"2025-W01": {"registrations": 1, "cancellations": 0, "turned_away": 0}}
+    # საგნის ჯამი ორივე ჯგუფის დღეებს აერთიანებს
+    assert report["subjects"]["მათემატიკა"]["buckets"]["2025-W02"]["registrations"] == 2
+    assert report["subjects"]["მათემატიკა"]["registrations"] == 3
+    assert len(stats.report("day")["subjects"]["მათემატიკა"]["buckets"]) == 4
+
+
+def test_state_round_trip():
+    stats = CapacityStats.from_records(COURSES, [
+        record("ა", "1", "Active", "2025-01-06 10:00:00"),
+        record("ბ", "1", "Active", "2025-01-06 12:00:00"),
+        record("ბ", "2", "Cancelled", "2025-01-07 12:00:00"),
+    ])
+    restored = CapacityStats.from_state(COURSES, stats.to_state())
+    assert restored.report() == stats.report()
+    with pytest.raises(ValueError):
+        CapacityStats.from_state([dict(COURSES[0], capacity=5), COURSES[1]], stats.to_state())
+
+
+def write(path, data, mode='wb'):
+    with open(path, mode=mode) as f:
+        f.write(data)
+
+
+def fresh_report(path):
+    if os.path.exists(path + ".capacity.json"):
+        os.remove(path + ".capacity.json")
+    return StudentDatabase(path).get_capacity_stats(REGISTRY_COURSES).report("week")
+
+
+def forbid_full_build(monkeypatch):
+    def from_records(courses, records):
+        raise AssertionError("რეესტრი თავიდან წაიკითხა")
+    monkeypatch.setattr(analytics.CapacityStats, "from_records", staticmethod(from_records))
+
+
+def test_next_process_resumes_saved_stats(tmp_path, monkeypatch):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(80, 300))
+    write(path, data)
+    db = StudentDatabase(path)
+    db.add_rejection("3")
+    db.get_capacity_stats(REGISTRY_COURSES)
+    assert os.path.exists(db.capacity_stats_file)
+
+    # შემდეგ პროცესამდე: ახალი ხაზები და უარები
+    write(path, encode_rows(make_rows(81, 50, start=300), header=False), mode='ab')
+    db.add_rejection("3")
+    db.add_rejection("5")
+    with monkeypatch.context() as patch:
+        forbid_full_build(patch)
+        db = StudentDatabase(path)
+        db.get_live_state()  # სხვა წარმოდგენა უკვე ჩატვირთულია - სტატისტიკა მის საზღვრამდე მიიყვანება
+        resumed = db.get_capacity_stats(REGISTRY_COURSES).report("week")
+        write(path, encode_rows(make_rows(82, 20, start=350), header=False), mode='ab')
+        refreshed = db.get_capacity_stats(REGISTRY_COURSES).report("week")
+        resumed_again = StudentDatabase(path).get_capacity_stats(REGISTRY_COURSES).report("week")
+
+    assert sum(section(resumed, "3")["buckets"][week]["turned_away"] for week in section(resumed, "3")["buckets"]) == 2
+    assert refreshed == resumed_again == fresh_report(path)
+
+
+def test_saved_stats_ignored_after_rewrite(tmp_path, monkeypatch):
+    path = str(tmp_path / "registry.csv")
+    rows = make_rows(83, 200)
+    write(path, encode_rows(rows))
+    StudentDatabase(path).get_capacity_stats(REGISTRY_COURSES)
+
+    # იგივე inode, უფრო დიდი ზომა: გასწორებული ასლი (პირველი ხაზების გარეშე) გადაიწერა ზემოდან და გაიზარდა
+    write(path, encode_rows(rows[5:] + make_rows(84, 30, start=200)))
+    built = []
+    original = CapacityStats.from_records.__func__
+
+    def from_records(cls, courses, records):
+        built.append(True)
+        return original(cls, courses, records)
+    monkeypatch.setattr(CapacityStats, "from_records", classmethod(from_records))
+    report = StudentDatabase(path).get_capacity_stats(REGISTRY_COURSES).report("week")
+    assert built
+    monkeypatch.undo()
+    assert report == fresh_report(path)
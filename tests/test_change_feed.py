@@ -0,0 +1,166 @@
+# ცვლილებების ნაკადი (ChangeFeed.changes): ჩანაწერები და კურსორები უნდა ემთხვეოდეს
+# csv.DictReader-ით გადათამაშებას, გაგრძელება კი ნებისმიერი კურსორიდან უნდა იყოს შესაძლებელი.
+
+import os
+
+import pytest
+
+from change_feed import ChangeFeed, StaleCursorError
+from main import run_command
+from registry_replay import complete_part, encode_rows, make_rows, replay
+
+
+def write(path, data):
+    with open(path, mode='wb') as f:
+        f.write(data)
+
+
+def as_dicts(changes):
+    return [record.to_dict() for record, _ in changes]
+
+
+@pytest.mark.parametrize("multiline", [False, True])
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_changes_match_replay_and_resume_from_every_cursor(tmp_path, newline, multiline):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(10, 60, multiline=multiline), newline)
+    write(path, data)
+    feed = ChangeFeed(path)
+    expected = replay(data)
+
+    changes = list(feed.changes())
+    assert as_dicts(changes) == expected
+    # ბოლო კურსორი = ფაილის ბოლო და ყველა წაკითხული ხაზი
+    assert changes[-1][1] == (len(data), len(expected))
+    for i, (_, cursor) in enumerate(changes):
+        assert as_dicts(feed.changes(cursor)) == expected[i + 1:]
+
+
+def test_partial_last_line_is_read_once_complete(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    full = encode_rows(make_rows(11, 20, multiline=True), "\r\n")
+    # ბოლო ჩანაწერის ნახევარი ჯერ არ ჩაწერილა
+    write(path, full[:len(full) - 25])
+    feed = ChangeFeed(path)
+    first = list(feed.changes())
+    assert as_dicts(first) == replay(complete_part(full[:len(full) - 25]))
+
+    write(path, full)
+    rest = list(feed.changes(first[-1][1]))
+    assert as_dicts(first + rest) == replay(full)
+    assert rest[-1][1][0] == len(full)
+
+
+def test_multiline_field_split_across_appends(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    row = ["ლუკა\nგიორგი"] + make_rows(12, 1)[0][1:]
+    data = encode_rows([row])
+    # ჩაწერა შეწყდა ბრჭყალებიანი ველის შიგნით, '\n'-ის შემდეგ
+    cut = data.index(b"\n", data.index("ლუკა".encode("utf-8"))) + 1
+    write(path, data[:cut])
+    feed = ChangeFeed(path)
+    assert list(feed.changes()) == []
+
+    write(path, data)
+    assert as_dicts(feed.changes()) == replay(data)
+
+
+def test_cursor_not_on_line_boundary(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(13, 10))
+    write(path, data)
+    feed = ChangeFeed(path)
+    _, cursor = next(iter(feed.changes()))
+    with pytest.raises(StaleCursorError):
+        list(feed.changes((cursor[0] + 3, cursor[1])))
+
+
+def test_cursor_past_truncated_file(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(14, 10))
+    write(path, data)
+    feed = ChangeFeed(path)
+    cursor = list(feed.changes())[-1][1]
+    write(path, data[:len(data) // 2])
+    with pytest.raises(StaleCursorError):
+        list(feed.changes(cursor))
+
+
+@pytest.mark.parametrize("content", [b"", b"name,surname"])
+def test_empty_or_incomplete_header(tmp_path, content):
+    path = str(tmp_path / "registry.csv")
+    write(path, content)
+    feed = ChangeFeed(path)
+    assert list(feed.changes()) == []
+    assert list(feed.changes((0, 0))) == []
+
+
+def test_cursors_are_saved_per_consumer(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    write(path, encode_rows(make_rows(15, 5)))
+    feed = ChangeFeed(path)
+    feed.save_cursor("sms", (10, 1))
+    feed.save_cursor("acct", (20, 2))
+    feed.save_cursor("sms", (30, 3))
+    assert feed.load_cursor("sms") == (30, 3)
+    assert feed.load_cursor("acct") == (20, 2)
+    assert feed.load_cursor("new") == feed.initial_cursor()
+
+
+def test_feed_cursor_passes_trailing_malformed_rows(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(15, 10)) + b"a,b,c\n"
+    write(path, data)
+    feed = ChangeFeed(path)
+    changes = list(feed.changes())
+    assert changes[-1][1] == (len(data) - 6, 10)
+    assert feed.cursor == (len(data), 11)
+    assert list(feed.changes(feed.cursor)) == []
+
+
+def saved_cursor_after_rewrite(tmp_path, in_place=False):
+    path = str(tmp_path / "registry.csv")
+    rows = make_rows(16, 40)
+    data = encode_rows(rows)
+    write(path, data)
+    feed = ChangeFeed(path)
+    feed.save_cursor("sms", list(feed.changes())[20][1])
+
+    if in_place:
+        # იგივე inode (მაგ. cp გასწორებული.csv registry.csv): ხაზები წაინაცვლა
+        write(path, encode_rows(rows[1:] + rows[:1]))
+    else:
+        # სახელები იგივე სიგრძისაა: ძველი offset ახალ ფაილშიც ხაზის საზღვარზე ხვდება
+        rewritten = data.replace("სახელი1".encode("utf-8"), "სახელი2".encode("utf-8"))
+        write(path + ".new", rewritten)
+        os.replace(path + ".new", path)
+    return feed
+
+
+@pytest.mark.parametrize("in_place", [False, True])
+def test_saved_cursor_on_rewritten_file_is_stale(tmp_path, in_place):
+    feed = saved_cursor_after_rewrite(tmp_path, in_place)
+    with pytest.raises(StaleCursorError):
+        feed.load_cursor("sms")
+
+
+def test_saved_cursor_survives_appends(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(17, 30))
+    write(path, data)
+    feed = ChangeFeed(path)
+    cursor = list(feed.changes())[-1][1]
+    feed.save_cursor("sms", cursor)
+    appended = encode_rows(make_rows(18, 5, start=30), header=False)
+    with open(path, mode='ab') as f:
+        f.write(appended)
+    assert feed.load_cursor("sms") == cursor
+    assert as_dicts(feed.changes(feed.load_cursor("sms"))) == replay(data + appended)[30:]
+
+
+def test_changes_command_reports_stale_cursor(tmp_path, capsys):
+    saved_cursor_after_rewrite(tmp_path)
+    path = str(tmp_path / "registry.csv")
+    assert run_command(["--db", path, "changes", "--consumer", "sms"]) == 2
+    assert "--from-start" in capsys.readouterr().err
+    assert run_command(["--db", path, "changes", "--consumer", "sms", "--from-start", "--format", "json"]) == 0
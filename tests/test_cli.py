@@ -0,0 +1,58 @@
+# CLI ქვებრძანებები: შემავალი მონაცემების შემოწმება და გასასვლელი კოდები.
+
+import io
+import json
+
+import pytest
+
+from main import run_command
+from registry_replay import encode_rows, make_rows, replay
+
+STUDENT = {"name": "ნინო", "surname": "ბერიძე", "father_name": "გიორგი", "phone": "555555555", "email": "a@b.ge"}
+
+
+def register(tmp_path, monkeypatch, capsys, payload):
+    db = str(tmp_path / "registry.csv")
+    text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+    monkeypatch.setattr("sys.stdin", io.StringIO(text))
+    code = run_command(["--db", db, "register", "--from-json", "-", "--format", "json"])
+    return code, json.loads(capsys.readouterr().out), db
+
+
+@pytest.mark.parametrize("payload", [
+    [1, 2],
+    "not json",
+    dict(STUDENT, course_ids="12", receipt_id="Z1"),
+    dict(STUDENT, course_ids=[["12"]], receipt_id="Z1"),
+])
+def test_register_rejects_malformed_payload(tmp_path, monkeypatch, capsys, payload):
+    code, result, db = register(tmp_path, monkeypatch, capsys, payload)
+    assert code == 2
+    assert result["ok"] is False and result["errors"]
+    with open(db, encoding="utf-8") as f:
+        assert len(f.readlines()) == 1  # მხოლოდ სათაური
+
+
+def test_register_valid_payload(tmp_path, monkeypatch, capsys):
+    code, result, _ = register(tmp_path, monkeypatch, capsys, dict(STUDENT, course_ids=["12", 5], receipt_id="Z1"))
+    assert code == 0
+    assert result["summary"]["course_ids"] == ["12", "5"]
+
+
+def test_roster_without_as_of_uses_current_state(tmp_path, capsys):
+    db = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(80, 300))
+    with open(db, mode='wb') as f:
+        f.write(data)
+    active = {}
+    for row in replay(data):
+        key = (row["name"], row["surname"], row["father_name"], row["course_id"])
+        if row["status"] == "Active":
+            active[key] = row["receipt_id"]
+        elif row["status"] == "Cancelled":
+            active.pop(key, None)
+
+    assert run_command(["--db", db, "roster", "--course", "3", "--format", "json"]) == 0
+    roster = json.loads(capsys.readouterr().out)
+    expected = sorted((key[:3], receipt) for key, receipt in active.items() if key[3] == "3")
+    assert [((r["name"], r["surname"], r["father_name"]), r["receipt_id"]) for r in roster] == expected
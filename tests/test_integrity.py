@@ -0,0 +1,134 @@
+# რეესტრის მთლიანობის შემოწმება (integrity.IntegrityChecker, fsck): თითო დარღვევის სახე,
+# გასწორებული ასლი და ნაწილებად (მათ შორის პარალელურად) შემოწმების თანხვედრა ერთ გავლასთან.
+
+import csv
+import io
+import json
+
+import pytest
+
+from integrity import (
+    MALFORMED, ORPHAN_CANCEL, OVER_CAPACITY, RECEIPT_REUSED, UNKNOWN_COURSE, IntegrityChecker,
+)
+from main import run_command
+from registry_replay import COURSE_IDS, HEADER, encode_rows, make_rows
+
+COURSES = [{"id": course_id, "capacity": 2} for course_id in COURSE_IDS]
+
+
+def row(name, course_id, status, receipt_id, timestamp="2025-09-01 10:00:00"):
+    return [name, "გვარი", "მამა", "555000000", "a@b.ge", course_id, "კურსი", "MON_10_12", status, receipt_id, timestamp]
+
+
+# (ხაზი, მოსალოდნელი დარღვევა ან None); ხაზის ნომერი = ინდექსი + 2 (სათაურის შემდეგ)
+FIXTURE = [
+    (row("ნინო", "1", "Active", "R1"), None),
+    (row("ნინო", "2", "Active", "R1"), None),
+    (row("ლუკა", "1", "Active", "R2"), None),
+    (row("ანა", "1", "Active", "R3"), OVER_CAPACITY),
+    (row("ანა", "1", "Cancelled", "R3"), None),
+    (row("გიო", "3", "Cancelled", "R4"), ORPHAN_CANCEL),
+    (row("გიო", "99", "Active", "R5"), UNKNOWN_COURSE),
+    (row("ეკა", "4", "Active", "R2"), RECEIPT_REUSED),  # ლუკას ქვითარი
+    (row("ნინო", "5", "Active", "R6"), None),  # ახალი გადახდა ხურავს R1-ს
+    (row("ნინო", "6", "Active", "R1"), RECEIPT_REUSED),  # დახურულ გადახდას უბრუნდება
+    (row("ნინო", "7", "Active", "R7")[:9], MALFORMED),
+    (row("თეა", "2", "Deleted", "R8"), MALFORMED),
+    (row("თეა", "2", "Active", "R8", "01.09.2025 10:00"), MALFORMED),
+    (row("", "2", "Active", "R8"), MALFORMED),
+]
+
+
+def write(path, data):
+    with open(path, mode='wb') as f:
+        f.write(data)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    write(path, encode_rows([r for r, _ in FIXTURE]))
+    return path
+
+
+def test_each_violation_kind(registry):
+    checker = IntegrityChecker(COURSES, workers=1)
+    found = [(v["line"], v["kind"]) for v in checker.check(registry)]
+    assert found == [(i + 2, kind) for i, (_, kind) in enumerate(FIXTURE) if kind]
+    assert checker.rows == len(FIXTURE)
+    assert checker.counts == {MALFORMED: 4, ORPHAN_CANCEL: 1, OVER_CAPACITY: 1, RECEIPT_REUSED: 2, UNKNOWN_COURSE: 1}
+
+
+def test_invalid_utf8_is_malformed(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows([row("ნინო", "1", "Active", "R1")])
+    write(path, data.replace("ნინო".encode("utf-8"), b"\xff\xfe", 1))
+    assert [(v["line"], v["kind"]) for v in IntegrityChecker(COURSES, workers=1).check(path)] == [(2, MALFORMED)]
+
+
+def test_interleaved_desks_are_not_reuse(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    # ლუკას ხაზი ნინოს გადახდის შუაშია - R1 ისევ ღიაა
+    write(path, encode_rows([row("ნინო", "1", "Active", "R1"), row("ლუკა", "2", "Active", "R2"),
+                             row("ნინო", "3", "Active", "R1")]))
+    assert list(IntegrityChecker(COURSES, workers=1).check(path)) == []
+
+
+def test_repair_drops_malformed_and_orphan_rows(registry, tmp_path):
+    repaired = str(tmp_path / "repaired.csv")
+    checker = IntegrityChecker(COURSES, workers=1)
+    list(checker.check(registry, repaired))
+    assert checker.repaired == repaired
+    with open(repaired, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == HEADER
+    assert rows[1:] == [r for r, kind in FIXTURE if kind not in (MALFORMED, ORPHAN_CANCEL)]
+
+    # გასწორებულ ასლში აღარ რჩება წაშლადი დარღვევები
+    again = IntegrityChecker(COURSES, workers=1)
+    list(again.check(repaired))
+    assert again.counts[MALFORMED] == again.counts[ORPHAN_CANCEL] == 0
+
+
+def reordered(data):
+    """იგივე ხაზები სვეტების სხვა რიგით."""
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8"), newline="")))
+    order = list(reversed(range(len(HEADER))))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([[r[i] for i in order] if len(r) == len(HEADER) else r for r in rows])
+    return buffer.getvalue().encode("utf-8")
+
+
+@pytest.mark.parametrize("columns", ["default", "reordered"])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_chunks_match_single_pass(tmp_path, workers, columns):
+    path = str(tmp_path / "registry.csv")
+    rows = make_rows(5, 600, multiline=True)
+    for i in range(0, len(rows), 37):
+        rows[i] = rows[i][:7]  # დაზიანებული ხაზები
+    data = encode_rows(rows, "\r\n")
+    write(path, data if columns == "default" else reordered(data))
+    # კურსი "7" კატალოგში არ არის - უცნობი კურსები
+    single = IntegrityChecker(COURSES[:-1], workers=1, chunk_size=len(data))
+    expected = list(single.check(path, str(tmp_path / "single.csv")))
+    # პატარა ნაწილები: საზღვრები ბრჭყალებიანი მრავალხაზიანი ველების გვერდით ხვდება
+    chunked = IntegrityChecker(COURSES[:-1], workers=workers, chunk_size=500)
+    assert list(chunked.check(path, str(tmp_path / "chunked.csv"))) == expected
+    assert (chunked.rows, chunked.counts) == (single.rows, single.counts)
+    assert all(single.counts.values())
+    with open(tmp_path / "single.csv", mode='rb') as a, open(tmp_path / "chunked.csv", mode='rb') as b:
+        assert a.read() == b.read()
+
+
+def test_cli_reports_missing_header_without_repaired_copy(tmp_path, capsys):
+    path = str(tmp_path / "registry.csv")
+    write(path, b"name,surname\n")
+    repaired = str(tmp_path / "repaired.csv")
+    assert run_command(["--db", path, "fsck", "--repair", repaired, "--workers", "1"]) == 1
+    out = capsys.readouterr().out
+    assert "სათაურში აკლია ველები" in out and f"გასწორებული ასლი: {repaired}" not in out
+    assert not (tmp_path / "repaired.csv").exists()
+
+    assert run_command(["--db", path, "fsck", "--repair", repaired, "--workers", "1", "--format", "json"]) == 1
+    assert json.loads(capsys.readouterr().out)["repaired"] is None
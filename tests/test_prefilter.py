@@ -0,0 +1,97 @@
+# mmap წინასწარი ფილტრი (StudentDatabase._prefiltered_records / _has_multiline_records):
+# შედეგი უნდა ემთხვეოდეს csv.DictReader-ით სრულ გადათამაშებას.
+
+import os
+
+import pytest
+
+from main import StudentDatabase
+from registry_replay import (
+    COURSE_IDS, encode_rows, history, make_rows, occupancy, record_history, replay, students,
+)
+
+
+def write(path, data):
+    with open(path, mode='wb') as f:
+        f.write(data)
+
+
+def assert_matches_replay(db, data):
+    rows = replay(data)
+    expected = occupancy(rows)
+    for course_id in COURSE_IDS:
+        assert db.get_course_occupancy(course_id) == expected.get(course_id, 0), course_id
+    for key in students(rows):
+        assert record_history(db.get_student_history(*key)) == history(rows, key), key
+    active_receipts = {row["receipt_id"] for row in rows if row["status"] == "Active"}
+    for receipt_id in {row["receipt_id"] for row in rows} | {"R-missing"}:
+        assert db.check_receipt_exists(receipt_id) == (receipt_id in active_receipts), receipt_id
+    # mmap გზაზე ცოცხალი მდგომარეობა არ უნდა ჩატვირთულიყო
+    assert db.loaded_views() == {}
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_single_line_records_use_mmap_path(tmp_path, newline):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(1, 300), newline)
+    write(path, data)
+    db = StudentDatabase(path)
+    assert db._prefiltered_records(b",1,") is not None
+    assert_matches_replay(db, data)
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_quoted_multiline_fields_fall_back_to_csv(tmp_path, newline):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(2, 300, multiline=True), newline)
+    write(path, data)
+    db = StudentDatabase(path)
+    assert db._prefiltered_records(b",1,") is None
+    assert_matches_replay(db, data)
+
+
+def test_multiline_record_appended_after_check(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(3, 100), "\r\n")
+    write(path, data)
+    db = StudentDatabase(path)
+    assert db._prefiltered_records(b",1,") is not None
+
+    # შემოწმება ინკრემენტულია - მოგვიანებით დამატებული მრავალხაზიანი ველიც უნდა შეამჩნიოს
+    appended = encode_rows([["ლუკა\nგიორგი"] + make_rows(4, 1)[0][1:]], "\r\n", header=False)
+    with open(path, mode='ab') as f:
+        f.write(appended)
+    assert db._prefiltered_records(b",1,") is None
+    assert_matches_replay(db, data + appended)
+
+
+def test_partial_last_line(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    full = encode_rows(make_rows(5, 200), "\r\n")
+    # ბოლო ხაზი ჯერ იწერება: ჩაწერილია მხოლოდ მისი ნახევარი
+    data = full[:len(full) - 40]
+    write(path, data)
+    assert_matches_replay(StudentDatabase(path), data)
+
+
+def test_rewritten_file_rechecks_multiline(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    write(path, encode_rows(make_rows(6, 100, multiline=True)))
+    db = StudentDatabase(path)
+    assert db._prefiltered_records(b",1,") is None
+
+    # იგივე სახელით ახალი ფაილი (სხვა inode) მრავალხაზიანი ველების გარეშე
+    data = encode_rows(make_rows(7, 150))
+    write(path + ".new", data)
+    os.replace(path + ".new", path)
+    assert db._prefiltered_records(b",1,") is not None
+    assert_matches_replay(db, data)
+
+
+def test_empty_file(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    write(path, b"")
+    db = StudentDatabase(path)
+    assert db.get_course_occupancy("1") == 0
+    assert db.get_student_history("სახელი0", "გვარი", "მამა") == []
+    assert db.check_receipt_exists("R0") is False
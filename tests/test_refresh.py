@@ -0,0 +1,168 @@
+# ფაილის ბოლოს დევნება (StudentDatabase.refresh / _iter_records_until): ჩატვირთული
+# წარმოდგენები სხვა მაგიდის ჩანაწერების შემდეგ უნდა ემთხვეოდეს csv.DictReader-ით სრულ გადათამაშებას.
+
+import os
+
+import pytest
+
+from main import StudentDatabase
+from registry_replay import (
+    complete_part, encode_rows, history, make_rows, occupancy, occupancy_as_of, record_history, replay, students,
+)
+from records import encode_timestamp
+
+
+def write(path, data, mode='wb'):
+    with open(path, mode=mode) as f:
+        f.write(data)
+
+
+def load_views(db):
+    db.get_live_state()
+    db.get_timeline_index()
+
+
+def assert_views_match(db, data):
+    rows = replay(data)
+    assert db.get_all_occupancies() == occupancy(rows)
+    for key in students(rows):
+        assert record_history(db.get_student_history(*key)) == history(rows, key), key
+    timeline = db.get_timeline_index()
+    for ts in sorted({encode_timestamp(row["timestamp"]) for row in rows})[::7]:
+        assert timeline.occupancy_as_of(ts) == occupancy_as_of(rows, ts), ts
+
+
+@pytest.mark.parametrize("multiline", [False, True])
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_rows_from_another_desk(tmp_path, newline, multiline):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(20, 150, multiline=multiline), newline)
+    write(path, data)
+    db = StudentDatabase(path)
+    load_views(db)
+    tail = db._tail
+
+    for batch in range(3):
+        appended = encode_rows(make_rows(21 + batch, 40, multiline=multiline, start=150 + batch * 40), newline, header=False)
+        write(path, appended, mode='ab')
+        data += appended
+        assert_views_match(db, data)
+    # წარმოდგენები ინკრემენტულად განახლდა და თავიდან არ აგებულა
+    assert db._tail[:2] == tail[:2] and db._tail[2] == len(data)
+
+
+def test_partial_last_line(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(30, 100, multiline=True), "\r\n")
+    write(path, data)
+    db = StudentDatabase(path)
+    load_views(db)
+
+    appended = encode_rows(make_rows(31, 10, multiline=True, start=100), "\r\n", header=False)
+    write(path, appended[:-20], mode='ab')
+    assert_views_match(db, complete_part(data + appended[:-20]))
+
+    write(path, appended[-20:], mode='ab')
+    assert_views_match(db, data + appended)
+
+
+def test_first_load_stops_before_partial_last_line(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(34, 100), "\r\n")
+    # ბოლო ხაზის timestamp ჯერ ბოლომდე არ ჩაწერილა - სვეტების რაოდენობა უკვე სწორია
+    write(path, data[:-5])
+    db = StudentDatabase(path)
+    load_views(db)
+    assert_views_match(db, complete_part(data[:-5]))
+
+    write(path, data[-5:], mode='ab')
+    assert_views_match(db, data)
+
+
+def test_view_loaded_later_sees_same_rows(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(32, 80), "\r\n")
+    write(path, data)
+    db = StudentDatabase(path)
+    db.get_live_state()
+
+    # ახალი წარმოდგენა უკვე ჩატვირთულების საზღვრამდე იკითხება, შემდეგ ორივე ერთად ახლდება
+    appended = encode_rows(make_rows(33, 20, start=80), "\r\n", header=False)
+    write(path, appended[:-10], mode='ab')
+    db.get_timeline_index()
+    write(path, appended[-10:], mode='ab')
+    assert_views_match(db, data + appended)
+
+
+def test_truncated_file_is_reloaded(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(40, 200))
+    write(path, data)
+    db = StudentDatabase(path)
+    load_views(db)
+
+    # იგივე inode, ნაკლები ზომა (მაგ. fsck-ის გასწორებული ასლი ჩაიწერა ადგილზე)
+    shorter = encode_rows(make_rows(41, 120))
+    write(path, shorter)
+    assert_views_match(db, shorter)
+
+
+def test_rewritten_file_is_reloaded(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(50, 100))
+    write(path, data)
+    db = StudentDatabase(path)
+    load_views(db)
+
+    # სხვა inode, უფრო დიდი ზომა და ძველი offset ისევ ხაზის საზღვარზეა (სახელები იგივე სიგრძისაა),
+    # ამიტომ ცვლილებას მხოლოდ inode-ის შედარება ამჩნევს
+    rewritten = data.replace("სახელი1".encode("utf-8"), "სახელი2".encode("utf-8"))
+    rewritten += encode_rows(make_rows(51, 60, start=100), header=False)
+    write(path + ".new", rewritten)
+    os.replace(path + ".new", path)
+    assert_views_match(db, rewritten)
+
+
+def test_empty_file_then_rows(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    write(path, b"")
+    db = StudentDatabase(path)
+    load_views(db)
+    assert db.get_all_occupancies() == {}
+
+    data = encode_rows(make_rows(60, 50), "\r\n")
+    write(path, data, mode='ab')
+    assert_views_match(db, data)
+
+
+def test_missing_file_then_restored(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(70, 120))
+    write(path, data)
+    db = StudentDatabase(path)
+    load_views(db)
+
+    # ფაილი წაიშალა და წარმოდგენები ცარიელი ფაილიდან აიგო; აღდგენის შემდეგ თავიდან უნდა აიგოს
+    os.remove(path)
+    load_views(db)
+    assert db.get_all_occupancies() == {}
+    write(path, data)
+    assert_views_match(db, data)
+
+
+def test_malformed_last_line_is_read_once(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(72, 80))
+    write(path, data)
+    db = StudentDatabase(path)
+    load_views(db)
+
+    # სვეტების არასწორი რაოდენობა: ჩანაწერი გამოიტოვება, მაგრამ offset მას უნდა გადაცდეს
+    broken = b"a,b,c\n"
+    write(path, broken, mode='ab')
+    assert_views_match(db, data + broken)
+    assert db._tail[2:] == (len(data) + len(broken), 81)
+
+    appended = encode_rows(make_rows(73, 10, start=80), header=False)
+    write(path, appended, mode='ab')
+    assert_views_match(db, data + broken + appended)
@@ -0,0 +1,94 @@
+# შემოსავლის რეპორტი: თითო ქვითრის თანხა და ფასდაკლება უნდა ემთხვეოდეს იმას, რაც
+# რეგისტრაციისას calculate_prices-ით დაითვალა. მოწმდება NumPy-ის და სუფთა Python-ის გზაც.
+
+import pytest
+
+import analytics
+from main import RegistrationSystem
+
+NINO = {"name": "ნინო", "surname": "ბერიძე", "father_name": "გიორგი", "phone": "555555555", "email": "a@b.ge"}
+LUKA = {"name": "ლუკა", "surname": "კაპანაძე", "father_name": "დავითი", "phone": "555555556", "email": "l@b.ge"}
+
+
+@pytest.fixture(params=["python", "numpy"])
+def system(request, tmp_path, monkeypatch):
+    if request.param == "numpy":
+        monkeypatch.setattr(analytics, "np", pytest.importorskip("numpy"))
+    else:
+        monkeypatch.setattr(analytics, "np", None)
+    return RegistrationSystem(str(tmp_path / "registry.csv"))
+
+
+def receipts(system):
+    report = system.build_revenue_report()
+    assert report["total"] == pytest.approx(sum(r["billed"] for r in report["receipts"]))
+    assert report["total"] == pytest.approx(sum(t["billed"] for t in report["tiers"].values()))
+    assert report["total"] == pytest.approx(sum(c["billed"] for c in report["courses"].values()))
+    return {r["receipt_id"]: r for r in report["receipts"]}
+
+
+def assert_billed(receipt, system, subjects_total, courses):
+    _, percent, price = system.calculate_prices(subjects_total)
+    assert receipt["subjects_total"] == subjects_total
+    assert receipt["discount_percent"] == percent
+    assert receipt["price_per_subject"] == pytest.approx(price)
+    assert receipt["billed"] == pytest.approx(price * courses)
+
+
+def test_register(system):
+    errors, summary = system.register_courses(NINO, ["1", "5", "13"], "R1")
+    assert not errors
+    receipt = receipts(system)["R1"]
+    assert receipt["billed"] == pytest.approx(summary["total"])
+    assert_billed(receipt, system, 3, 3)
+
+
+def test_edit_with_removals_and_additions(system):
+    system.register_courses(NINO, ["1", "5", "13"], "R1")
+    # რედაქტირება: ჯერ გაუქმებები, შემდეგ ახალი კურსები ახალი ქვითრით (edit_registration-ის რიგი)
+    errors, _ = system.cancel_courses("ნინო", "ბერიძე", "გიორგი", ["5", "13"])
+    assert not errors
+    errors, summary = system.register_courses(NINO, ["6", "9", "20"], "R2")
+    assert not errors
+
+    found = receipts(system)
+    assert_billed(found["R1"], system, 3, 3)
+    # ერთი დარჩენილი კურსი + სამი ახალი
+    assert_billed(found["R2"], system, 4, 3)
+    assert found["R2"]["billed"] == pytest.approx(summary["total"])
+
+
+def test_interleaved_desks(system):
+    courses = {c["id"]: c for c in system.courses}
+    # ორი მაგიდა ერთდროულად წერს: ლუკას ხაზი ნინოს გადახდის შუაშია
+    system.db.add_record(NINO, courses["1"], "R1")
+    system.db.add_record(LUKA, courses["2"], "R2")
+    system.db.add_record(NINO, courses["5"], "R1")
+    system.db.add_record(LUKA, courses["6"], "R2")
+    system.db.add_record(NINO, courses["13"], "R1")
+
+    found = receipts(system)
+    assert len(found) == 2
+    assert_billed(found["R1"], system, 3, 3)
+    assert_billed(found["R2"], system, 2, 2)
+    assert found["R1"]["billed"] == pytest.approx(510.0)
+
+
+def test_counts_above_top_tier(system):
+    # ძველი მონაცემები: ერთ ქვითარზე ცხრილის ბოლო საფეხურზე (5) მეტი საგანი
+    for course in system.courses[:7]:
+        system.db.add_record(NINO, course, "R1")
+    assert_billed(receipts(system)["R1"], system, 7, 7)
+
+    # მოკლე ცხრილი: ბოლო საფეხური ვრცელდება ზემოთაც
+    table = {1: 0, 2: 10}
+    report = analytics.revenue_report(system.db.get_all_records(), system.base_price, table)
+    assert report["receipts"][0]["discount_percent"] == 10
+    assert report["total"] == pytest.approx(7 * system.base_price * 0.9)
+
+
+def test_mixed_course_ids_sort(system):
+    courses = {c["id"]: c for c in system.courses}
+    system.db.add_record(NINO, dict(courses["1"], id="A1"), "R1")
+    system.db.add_record(NINO, courses["5"], "R1")
+    assert list(system.build_revenue_report()["courses"]) == ["5", "A1"]
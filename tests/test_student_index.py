@@ -0,0 +1,110 @@
+# სახელის ინდექსი: პრეფიქსი, რედაქტირების მანძილი და შედეგების რიგი.
+
+import random
+
+import pytest
+
+from main import StudentDatabase
+from registry_replay import encode_rows, make_rows, replay, students
+from student_index import StudentIndex, normalize, prefix_distance
+
+KEYS = [
+    ("გიორგი", "ბერიძე", "დავითი"),
+    ("გიორგი", "ბერიძიშვილი", "ნიკა"),
+    ("გიორგა", "ბერიძე", "ლევანი"),
+    ("გიო", "კაპანაძე", "დავითი"),
+    ("ნინო", "ბერიძე", "გიორგი"),
+    ("ნინა", "ბერი", "გიორგი"),
+]
+
+
+@pytest.fixture
+def index():
+    return StudentIndex.from_keys(KEYS)
+
+
+def test_prefix_match(index):
+    results = dict(index.search(surname="ბერიძ", max_distance=0))
+    assert set(results) == {k for k in KEYS if k[1].startswith("ბერიძ")}
+    assert set(results.values()) == {0}
+
+
+def test_short_query_allows_no_typos(index):
+    # 2 სიმბოლომდე მოთხოვნა მხოლოდ ზუსტ პრეფიქსს ემთხვევა
+    assert {k for k, _ in index.search(name="გი")} == {k for k in KEYS if k[0].startswith("გი")}
+    assert index.search(name="გა") == []
+
+
+def test_edit_distance(index):
+    results = dict(index.search(name="გიორკი", max_distance=1))
+    # გიორგა ორი ჩანაცვლებითაა დაშორებული
+    assert results == {KEYS[0]: 1, KEYS[1]: 1}
+    assert dict(index.search(name="გიორკი", max_distance=2))[KEYS[2]] == 2
+    assert index.search(name="გიორკი", max_distance=0) == []
+
+
+def test_ranking_distance_then_exactness(index):
+    ranked = [key for key, _ in index.search(name="ნინო", surname="ბერი", max_distance=1)]
+    # ნინო+ბერიძე: მანძილი 0, მაგრამ გვარი მხოლოდ პრეფიქსია; ნინა+ბერი: მანძილი 1
+    assert ranked == [("ნინო", "ბერიძე", "გიორგი"), ("ნინა", "ბერი", "გიორგი")]
+
+    ranked = [key for key, _ in index.search(surname="ბერიძე", max_distance=1)]
+    # ერთნაირ მანძილზე ზუსტი დამთხვევა პრეფიქსულზე წინაა
+    exact = [k for k in KEYS if k[1] == "ბერიძე"]
+    assert ranked[:len(exact)] == sorted(exact)
+    assert ranked[len(exact)] == ("გიორგი", "ბერიძიშვილი", "ნიკა")
+
+
+def test_limit(index):
+    assert len(index.search(father_name="გიორგი", limit=1)) == 1
+
+
+def test_normalized_query(index):
+    assert index.search(name="  გიო  ", surname="კაპანაძე") == [(("გიო", "კაპანაძე", "დავითი"), 0)]
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    letters = "აბგდევზთიკლმნ"
+
+    def word(n):
+        return "".join(rng.choice(letters) for _ in range(n))
+
+    keys = {(word(rng.randint(2, 6)), word(rng.randint(3, 8)), word(4)) for _ in range(800)}
+    index = StudentIndex.from_keys(keys)
+    for _ in range(100):
+        query = (word(rng.randint(0, 5)), word(rng.randint(0, 5)), "")
+        for max_distance in (0, 1, 2):
+            expected = {}
+            for key in keys:
+                total = 0
+                for value, text in zip(key, query):
+                    if not text:
+                        continue
+                    allowed = 0 if len(text) <= 2 else max_distance
+                    distance = prefix_distance(text, normalize(value))
+                    if distance > allowed:
+                        break
+                    total += distance
+                else:
+                    if any(query):
+                        expected[key] = total
+            found = dict(index.search(*query, max_distance=max_distance, limit=len(keys)))
+            assert found == expected, (query, max_distance)
+
+
+def test_index_from_live_state_matches_registry(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    data = encode_rows(make_rows(70, 200, multiline=True))
+    with open(path, mode='wb') as f:
+        f.write(data)
+    db = StudentDatabase(path)
+    db.get_live_state()
+    index = db.get_name_index()
+    assert len(index) == len(students(replay(data)))
+
+    # ახალი სტუდენტი სხვა მაგიდიდან - ინდექსი refresh()-ით ახლდება
+    row = ["ახალი", "სტუდენტი"] + make_rows(71, 1)[0][2:]
+    with open(path, mode='ab') as f:
+        f.write(encode_rows([row], header=False))
+    assert db.get_name_index().search("ახალი", "სტუდენტი") == [(("ახალი", "სტუდენტი", "მამა"), 0)]
@@ -0,0 +1,95 @@
+# დროითი ინდექსი: "as of" მდგომარეობა უნდა ემთხვეოდეს სრულ გადათამაშებას (მათ შორის
+# აცდენილი საათებით დამატებული ჩანაწერების შემდეგ), checkpoint-ების მეხსიერება კი წრფივი უნდა იყოს.
+
+import gc
+import random
+import tracemalloc
+
+import pytest
+
+from records import Record
+from timeline_index import TimelineIndex
+
+
+def make_records(count, students, seed=0, skew=0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        student = rng.randrange(students)
+        minute = max(i - rng.randint(0, skew), 0) if skew else i
+        day, minute = divmod(minute, 24 * 60)
+        records.append(Record(
+            f"სახელი{student}", "გვარი", "მამა", "555000000", "a@b.ge",
+            str(rng.randint(1, 21)), "კურსი", "MON_10_12",
+            "Cancelled" if rng.random() < 0.25 else "Active", f"R{i}",
+            20250101000000 + day * 1000000 + (minute // 60) * 10000 + (minute % 60) * 100,
+        ))
+    return records
+
+
+def replay(records, ts):
+    state = {}
+    for row in sorted(records, key=lambda row: row.ts):
+        if row.ts > ts:
+            break
+        key = (row.student_key, row.course_id)
+        if row.status == "Active":
+            state[key] = row
+        elif row.status == "Cancelled":
+            state.pop(key, None)
+    return state
+
+
+def query_points(records):
+    timestamps = sorted(row.ts for row in records)
+    return [0] + timestamps[::37] + [timestamps[-1], 99991231235959]
+
+
+@pytest.mark.parametrize("interval", [1, 16, 64])
+def test_state_matches_replay(interval):
+    records = make_records(3000, 400)
+    index = TimelineIndex.from_records(records, checkpoint_interval=interval)
+    for ts in query_points(records):
+        assert index.state_as_of(ts) == replay(records, ts), ts
+
+
+def test_out_of_order_appends_match_replay():
+    # სხვა მაგიდების აცდენილი საათები: ჩანაწერები ფაილის ბოლოში, მაგრამ დროით უკან
+    records = make_records(3000, 300, seed=1, skew=500)
+    index = TimelineIndex.from_records(records[:1500], checkpoint_interval=32)
+    index.add_records(records[1500:])
+    for ts in query_points(records):
+        assert index.state_as_of(ts) == replay(records, ts), ts
+
+
+def test_roster_and_student_courses():
+    records = make_records(500, 40, seed=2)
+    index = TimelineIndex.from_records(records, checkpoint_interval=16)
+    ts = sorted(row.ts for row in records)[300]
+    state = replay(records, ts)
+    roster = index.roster_as_of(ts, "3")
+    assert roster == sorted((row for (_, course_id), row in state.items() if course_id == "3"), key=lambda row: row.student_key)
+    key = ("სახელი7", "გვარი", "მამა")
+    assert sorted(row.course_id for row in index.student_courses_as_of(ts, *key)) == \
+        sorted(course_id for (student, course_id), _ in state.items() if student == key)
+
+
+def checkpoint_bytes_per_row(count):
+    # სტუდენტები უმეტესად უნიკალურია: მდგომარეობა ჩანაწერების რაოდენობის პროპორციულად იზრდება
+    records = make_records(count, count, seed=3)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        index = TimelineIndex.from_records(records, checkpoint_interval=64)
+        used, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(index) == count
+    return used / count
+
+
+def test_checkpoint_memory_is_linear():
+    small, large = (checkpoint_bytes_per_row(count) for count in (4000, 32000))
+    # სრული ასლები ყოველ checkpoint-ზე ~ count / 64 ასლს ნიშნავდა და ხაზზე ხარჯი რვაჯერ გაიზრდებოდა
+    assert large < small * 1.5, (small, large)
+    assert large < 1000, large
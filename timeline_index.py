@@ -0,0 +1,169 @@
+# timeline_index.py
+
+# წარსული მდგომარეობის ("as of") მოთხოვნები: დაკავებულობა, ჯგუფის სია და
+# სტუდენტის აქტიური კურსები მოცემული თარიღისთვის.
+# მოვლენები ინახება timestamp-ის მიხედვით დალაგებულად; ყოველ CHECKPOINT_INTERVAL
+# მოვლენაზე ინახება checkpoint. მოთხოვნა ბინარული ძებნით პოულობს უახლოეს checkpoint-ს
+# და ხელახლა ატარებს მხოლოდ მის შემდეგ მოვლენებს.
+# checkpoint-ი სრული ასლი არ არის: ინახება ინტერვალის წმინდა ცვლილება (delta), სრული
+# ასლი (snapshot) კი მხოლოდ მაშინ, როცა ბოლო ასლის შემდეგ დაგროვილი ცვლილებები
+# მდგომარეობის ნახევარს მიაღწევს. ასე ასლების ჯამური ზომა მოვლენების გაორმაგებულ
+# რაოდენობას არ აღემატება (მეხსიერება წრფივია), checkpoint-ის აღდგენა კი
+# O(მდგომარეობის ზომა) რჩება.
+
+from bisect import bisect_right, insort
+from datetime import datetime
+
+from records import TIMESTAMP_FORMAT, encode_timestamp
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def parse_as_of(text):
+    """'YYYY-MM-DD HH:MM:SS' ან 'YYYY-MM-DD' -> YYYYMMDDHHMMSS რიცხვი.
+
+    მხოლოდ თარიღის შემთხვევაში იგულისხმება დღის ბოლო (23:59:59), ანუ მდგომარეობა
+    ამ დღის ყველა ცვლილების შემდეგ. არასწორ ფორმატზე ისვრის ValueError-ს.
+    """
+    text = text.strip()
+    try:
+        moment = datetime.strptime(text, TIMESTAMP_FORMAT)
+    except ValueError:
+        moment = datetime.strptime(text, DATE_FORMAT).replace(hour=23, minute=59, second=59)
+    return encode_timestamp(moment.strftime(TIMESTAMP_FORMAT))
+
+
+class TimelineIndex:
+    """Record-ების დროითი ინდექსი. მდგომარეობა = { (student_key, course_id): Active Record }."""
+
+    CHECKPOINT_INTERVAL = 4096
+
+    def __init__(self, checkpoint_interval=None):
+        self.checkpoint_interval = checkpoint_interval or self.CHECKPOINT_INTERVAL
+        self._timestamps = []
+        self._events = []
+        # _deltas[i] - წმინდა ცვლილება checkpoint i-დან i + 1-მდე: ({ key: Record }, [წაშლილი key])
+        self._deltas = []
+        # სრული ასლები: _snapshot_at[j] ნომრის checkpoint-ის მდგომარეობა = _snapshots[j]
+        self._snapshot_at = [0]
+        self._snapshots = [{}]
+        # მდგომარეობა ბოლო checkpoint-ზე და ბოლო ასლის შემდეგ დაგროვილი ცვლილებების ზომა
+        self._head = {}
+        self._since_snapshot = 0
+
+    def __len__(self):
+        return len(self._events)
+
+    @classmethod
+    def from_records(cls, records, checkpoint_interval=None):
+        index = cls(checkpoint_interval)
+        # sorted სტაბილურია: ერთნაირი დროის ჩანაწერები ფაილის რიგს ინარჩუნებენ
+        index._events = sorted(records, key=lambda row: row.ts)
+        index._timestamps = [row.ts for row in index._events]
+        index._extend_checkpoints()
+        return index
+
+    def add_records(self, records):
+        for record in records:
+            self.add(record)
+
+    def add(self, record):
+        """ამატებს ახალ ჩანაწერს (მაგ. ფაილის ბოლოში დამატებულს). ჩვეულებრივ ეს უბრალო append-ია."""
+        if not self._timestamps or record.ts >= self._timestamps[-1]:
+            self._timestamps.append(record.ts)
+            self._events.append(record)
+        else:
+            # საათი უკან წავიდა: ვსვამთ თავის ადგილზე და ვშლით მის შემდეგ არსებულ checkpoint-ებს
+            position = bisect_right(self._timestamps, record.ts)
+            insort(self._timestamps, record.ts)
+            self._events.insert(position, record)
+            self._truncate_checkpoints(position // self.checkpoint_interval)
+        self._extend_checkpoints()
+
+    def _truncate_checkpoints(self, keep):
+        """ტოვებს მხოლოდ 0..keep ნომრის checkpoint-ებს."""
+        if keep >= len(self._deltas):
+            return
+        self._head = self._checkpoint_state(keep)
+        snapshots = bisect_right(self._snapshot_at, keep)
+        del self._snapshot_at[snapshots:]
+        del self._snapshots[snapshots:]
+        del self._deltas[keep:]
+        self._since_snapshot = sum(len(added) + len(removed) for added, removed in self._deltas[self._snapshot_at[-1]:])
+
+    def _extend_checkpoints(self):
+        interval = self.checkpoint_interval
+        head = self._head
+        while (len(self._deltas) + 1) * interval <= len(self._events):
+            start = len(self._deltas) * interval
+            delta = {}
+            self._apply(head, self._events[start:start + interval], delta)
+            # დამატებები dict.update-ით (C-ში) ერთიანდება, ამიტომ ისინი წაშლებისგან ცალკე ინახება
+            added = {key: row for key, row in delta.items() if row is not None}
+            removed = [key for key, row in delta.items() if row is None]
+            self._deltas.append((added, removed))
+            self._since_snapshot += len(delta)
+            # ასლი ღირს მდგომარეობის ზომა; ის იქმნება მხოლოდ მაშინ, როცა ამის ნახევარი ცვლილება დაგროვდა
+            if self._since_snapshot >= len(head) // 2:
+                self._snapshot_at.append(len(self._deltas))
+                self._snapshots.append(dict(head))
+                self._since_snapshot = 0
+
+    def _checkpoint_state(self, checkpoint):
+        """checkpoint ნომრის მდგომარეობის ახალი ასლი: უახლოესი სრული ასლი + მის შემდეგ ცვლილებები."""
+        if checkpoint == len(self._deltas):
+            return dict(self._head)
+        j = bisect_right(self._snapshot_at, checkpoint) - 1
+        state = dict(self._snapshots[j])
+        for added, removed in self._deltas[self._snapshot_at[j]:checkpoint]:
+            state.update(added)
+            for key in removed:
+                state.pop(key, None)
+        return state
+
+    def footprint(self):
+        """შენახული ობიექტების რაოდენობა მეხსიერების შესაფასებლად (იხ. branches.ENTRY_BYTES)."""
+        entries = len(self._head) + sum(map(len, self._snapshots))
+        entries += sum(len(added) + len(removed) for added, removed in self._deltas)
+        return {"record": len(self._events), "timeline_entry": entries}
+
+    @staticmethod
+    def _apply(state, events, delta=None):
+        # იგივე წესი, რაც get_student_history-ში: Cancelled შლის კურსს, სხვა სტატუსი მას არ ცვლის
+        for row in events:
+            key = (row.student_key, row.course_id)
+            if row.status == "Active":
+                state[key] = row
+                if delta is not None:
+                    delta[key] = row
+            elif row.status == "Cancelled":
+                state.pop(key, None)
+                if delta is not None:
+                    delta[key] = None
+
+    def state_as_of(self, ts):
+        """აქტიური ჩანაწერები ts მომენტისთვის (ts-ის ჩათვლით). ts - YYYYMMDDHHMMSS რიცხვი."""
+        count = bisect_right(self._timestamps, ts)
+        checkpoint = min(count // self.checkpoint_interval, len(self._deltas))
+        state = self._checkpoint_state(checkpoint)
+        self._apply(state, self._events[checkpoint * self.checkpoint_interval:count])
+        return state
+
+    def occupancy_as_of(self, ts):
+        """{ course_id: აქტიური სტუდენტების რაოდენობა } ts მომენტისთვის."""
+        occupancy = {}
+        for _, course_id in self.state_as_of(ts):
+            occupancy[course_id] = occupancy.get(course_id, 0) + 1
+        return occupancy
+
+    def roster_as_of(self, ts, course_id):
+        """ჯგუფის აქტიური ჩანაწერები ts მომენტისთვის, სტუდენტის მიხედვით დალაგებული."""
+        return sorted(
+            (row for (_, row_course_id), row in self.state_as_of(ts).items() if row_course_id == course_id),
+            key=lambda row: row.student_key,
+        )
+
+    def student_courses_as_of(self, ts, name, surname, father_name):
+        """სტუდენტის აქტიური კურსები ts მომენტისთვის."""
+        student_key = (name, surname, father_name)
+        return [row for (key, _), row in self.state_as_of(ts).items() if key == student_key]